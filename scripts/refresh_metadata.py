@@ -4,40 +4,72 @@
 import argparse
 import asyncio
 import json
+import os
 import time
+from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, List, Optional
 
-from registry_client import RegistryClient
+import json_utils
+from registry_client import AsyncTokenBucket, RegistryClient
 
 from logging import getLogger, basicConfig, INFO, DEBUG
 
 logger = getLogger(__name__)
 
 
+def _needs_refresh(version_info: dict, force_refresh_empty: bool) -> Optional[str]:
+    """Return why a version's metadata should be refetched, or None to skip it."""
+    if not version_info.get("metadata_cached", False):
+        return "not cached"
+    if force_refresh_empty and not version_info.get("comfy_nodes"):
+        return "empty (forced refresh)"
+    return None
+
+
+@dataclass(slots=True)
+class RefreshStats:
+    """Counters for a metadata refresh run."""
+    nodes_processed: int = 0
+    versions_attempted: int = 0
+    versions_with_data: int = 0
+    versions_confirmed_empty: int = 0
+    versions_failed: int = 0
+    total_metadata_entries: int = 0
+
+
 class MetadataRefresher:
     """Refreshes metadata for nodes in the cache."""
 
+    __slots__ = (
+        'delay', 'max_rate', 'checkpoint_interval', 'max_versions', 'max_retries',
+        'concurrency', 'use_delta', '_dirty_nodes', '_total_versions', '_total_metadata',
+        'stats'
+    )
+
     def __init__(
         self,
         delay_seconds: float = 0.5,
         checkpoint_interval: int = 10,
         max_versions: int = 10,
-        max_retries: int = 5
+        max_retries: int = 5,
+        concurrency: int = 8,
+        max_rate: float = 20.0,
+        use_delta: bool = True
     ):
         self.delay = delay_seconds
+        self.max_rate = max_rate
         self.checkpoint_interval = checkpoint_interval
         self.max_versions = max_versions
         self.max_retries = max_retries
-        self.stats = {
-            "nodes_processed": 0,
-            "versions_attempted": 0,
-            "versions_with_data": 0,
-            "versions_confirmed_empty": 0,
-            "versions_failed": 0,
-            "total_metadata_entries": 0
-        }
+        self.concurrency = concurrency
+        self.use_delta = use_delta
+        self._dirty_nodes: Dict[str, dict] = {}  # node_id -> node modified since last checkpoint
+        # Running cache totals, seeded on load and adjusted on each version update
+        self._total_versions = 0
+        self._total_metadata = 0
+        self.stats = RefreshStats()
 
     async def refresh_cache(
         self,
@@ -55,18 +87,31 @@ class MetadataRefresher:
         logger.info("=" * 60)
         logger.info(f"Cache file: {cache_file}")
         logger.info(f"Output file: {output_file}")
-        logger.info(f"Delay between requests: {self.delay}s")
+        logger.info(f"Concurrency: {self.concurrency}")
         logger.info(f"Max versions per node: {self.max_versions}")
         logger.info(f"Force refresh empty: {force_refresh_empty}")
 
         # Load cache
         logger.info("Loading cache...")
-        with open(cache_file, 'r') as f:
-            cache_data = json.load(f)
+        cache_data = json_utils.load(cache_file)
 
         nodes_list = cache_data.get("nodes", [])
         logger.info(f"Loaded {len(nodes_list)} nodes from cache")
 
+        # Resume: re-apply checkpoints left behind by an interrupted run
+        delta_file = Path(str(output_file) + '.delta.jsonl')
+        if delta_file.exists():
+            applied = self._apply_deltas(nodes_list, delta_file)
+            logger.info(f"Resumed {applied} node updates from {delta_file}")
+
+        # Seed running totals once so saves don't rescan the whole cache
+        self._total_versions = sum(len(n.get("versions_list", [])) for n in nodes_list)
+        self._total_metadata = sum(
+            len(v.get("comfy_nodes") or [])
+            for n in nodes_list
+            for v in n.get("versions_list", [])
+        )
+
         # Filter to target nodes if specified
         if target_nodes:
             original_count = len(nodes_list)
@@ -82,19 +127,40 @@ class MetadataRefresher:
             nodes_list = nodes_list[:max_nodes]
             logger.info(f"Limited to first {max_nodes} nodes")
 
-        # Process nodes with checkpointing
-        async with RegistryClient(max_retries=self.max_retries) as client:
-            for i, node in enumerate(nodes_list):
-                node_id = node["id"]
-                logger.info(f"\n[{i+1}/{len(nodes_list)}] Processing {node_id}...")
-
-                await self._refresh_node_metadata(client, node, force_refresh_empty)
-                self.stats["nodes_processed"] += 1
-
-                # Checkpoint save
-                if (i + 1) % self.checkpoint_interval == 0:
-                    self._save_cache(cache_data, output_file)
-                    logger.info(f"✅ Checkpoint saved ({i+1}/{len(nodes_list)} nodes)")
+        # Pace requests with an adaptive token bucket seeded from --delay
+        rate_limiter = AsyncTokenBucket(
+            rate=1 / self.delay if self.delay > 0 else self.max_rate,
+            burst=self.concurrency,
+            max_rate=self.max_rate
+        )
+        logger.info(f"Initial request rate: {rate_limiter.rate:.2f} req/s (max {self.max_rate})")
+
+        # Process nodes in checkpoint-sized batches; the semaphore bounds the
+        # number of in-flight requests across all nodes of a batch
+        semaphore = asyncio.Semaphore(self.concurrency)
+        async with RegistryClient(
+            concurrency=self.concurrency,
+            max_retries=self.max_retries,
+            rate_limiter=rate_limiter
+        ) as client:
+            for i in range(0, len(nodes_list), self.checkpoint_interval):
+                batch = nodes_list[i:i + self.checkpoint_interval]
+                done = i + len(batch)
+                logger.info(f"\n[{done}/{len(nodes_list)}] Processing {len(batch)} nodes...")
+
+                await asyncio.gather(*[
+                    self._refresh_node_metadata(client, node, force_refresh_empty, semaphore)
+                    for node in batch
+                ])
+                self.stats.nodes_processed += len(batch)
+
+                # Checkpoint save (only the nodes changed in this batch)
+                if done < len(nodes_list):
+                    if self.use_delta:
+                        self._save_checkpoint(output_file)
+                    else:
+                        self._save_cache(cache_data, output_file, is_checkpoint=True)
+                    logger.info(f"✅ Checkpoint saved ({done}/{len(nodes_list)} nodes)")
 
         # Final save
         self._save_cache(cache_data, output_file)
@@ -107,137 +173,228 @@ class MetadataRefresher:
         self,
         client: RegistryClient,
         node: dict,
-        force_refresh_empty: bool
+        force_refresh_empty: bool,
+        semaphore: asyncio.Semaphore
     ):
         """Refresh metadata for top N versions of a node."""
         node_id = node["id"]
         versions_list = node.get("versions_list", [])
 
         if not versions_list:
-            logger.warning(f"  No versions found for {node_id}")
+            logger.warning("  No versions found for %s", node_id)
             return
 
-        # Get top N versions
+        # Get top N versions and find the ones to refetch before doing any
+        # other work, so fully cached nodes cost a single scan
         top_versions = versions_list[:self.max_versions]
-        logger.info(f"  Checking top {len(top_versions)} versions")
-
-        versions_needing_refresh = []
-        for version_info in top_versions:
-            comfy_nodes = version_info.get("comfy_nodes", [])
-            metadata_cached = version_info.get("metadata_cached", False)
-
-            # Determine if needs refresh
-            needs_refresh = False
-            if not metadata_cached:
-                needs_refresh = True
-                reason = "not cached"
-            elif force_refresh_empty and len(comfy_nodes) == 0:
-                needs_refresh = True
-                reason = "empty (forced refresh)"
-            elif len(comfy_nodes) > 0:
-                reason = f"has {len(comfy_nodes)} entries (skipping)"
-            else:
-                reason = "cached as empty (skipping)"
-
-            if needs_refresh:
-                versions_needing_refresh.append((version_info, reason))
-            else:
-                logger.debug(f"    {version_info['version']}: {reason}")
+        versions_needing_refresh = [
+            (version_info, reason)
+            for version_info in top_versions
+            if (reason := _needs_refresh(version_info, force_refresh_empty))
+        ]
 
         if not versions_needing_refresh:
-            logger.info(f"  ✅ All top {len(top_versions)} versions already have metadata")
+            logger.debug("  ✅ %s: all top %d versions already have metadata", node_id, len(top_versions))
             return
 
-        logger.info(f"  Found {len(versions_needing_refresh)} versions needing refresh")
+        logger.info("  %s: %d of top %d versions need refresh", node_id, len(versions_needing_refresh), len(top_versions))
 
-        # Fetch metadata for each version
-        for version_info, reason in versions_needing_refresh:
-            version = version_info["version"]
-            logger.info(f"    Fetching {node_id}@{version} ({reason})...")
-
-            self.stats["versions_attempted"] += 1
-
-            # Fetch with rate limiting
-            result = await client.get_comfy_nodes(node_id, version)
-            await asyncio.sleep(self.delay)
-
-            # Update cache based on result
-            if result is None:
-                # Failed to fetch
-                logger.warning(f"      ❌ Failed to fetch (rate limit/timeout/error)")
-                version_info["metadata_refresh_attempted"] = datetime.now().isoformat()
-                version_info["metadata_refresh_failed"] = True
-                self.stats["versions_failed"] += 1
-            elif result:
-                # Success with data!
-                version_info["comfy_nodes"] = result
-                version_info["metadata_cached"] = True
-                version_info["metadata_refresh_attempted"] = datetime.now().isoformat()
-                version_info["metadata_refresh_failed"] = False
-                logger.info(f"      ✅ Fetched {len(result)} comfy-nodes")
-                self.stats["versions_with_data"] += 1
-                self.stats["total_metadata_entries"] += len(result)
-            else:
-                # Confirmed empty (legitimate)
-                version_info["comfy_nodes"] = []
-                version_info["metadata_cached"] = True
-                version_info["metadata_refresh_attempted"] = datetime.now().isoformat()
-                version_info["metadata_refresh_failed"] = False
-                logger.info(f"      ✅ Confirmed empty (no metadata exists)")
-                self.stats["versions_confirmed_empty"] += 1
+        # Fetch metadata for all versions concurrently; each task only
+        # writes to its own version_info dict
+        now_iso = datetime.now().isoformat()
+        await asyncio.gather(*[
+            self._fetch_one(client, node_id, version_info, reason, semaphore, now_iso)
+            for version_info, reason in versions_needing_refresh
+        ])
 
         # Update node metadata_count
         node["metadata_count"] = sum(
             1 for v in versions_list
             if v.get("metadata_cached", False) and v.get("comfy_nodes") is not None
         )
+        self._dirty_nodes[node_id] = node
 
-    def _save_cache(self, cache_data: dict, output_file: Path):
-        """Save cache atomically."""
-        try:
-            # Update top-level stats
-            nodes = cache_data["nodes"]
-            total_versions = sum(len(n.get("versions_list", [])) for n in nodes)
-            total_metadata = sum(
-                sum(len(v.get("comfy_nodes", [])) for v in n.get("versions_list", []))
-                for n in nodes
-            )
+    async def _fetch_one(
+        self,
+        client: RegistryClient,
+        node_id: str,
+        version_info: dict,
+        reason: str,
+        semaphore: asyncio.Semaphore,
+        now_iso: str
+    ):
+        """Fetch metadata for a single version and update it in place.
+
+        now_iso is the refresh-pass timestamp shared by all versions of the node.
+        """
+        version = version_info["version"]
+
+        # Fetch (pacing is handled by the client's rate limiter)
+        async with semaphore:
+            logger.info("    Fetching %s@%s (%s)...", node_id, version, reason)
+            result = await client.get_comfy_nodes(node_id, version)
+
+        self.stats.versions_attempted += 1
+
+        # Update cache based on result
+        if result is None:
+            # Failed to fetch
+            logger.warning("      ❌ %s@%s: failed to fetch (rate limit/timeout/error)", node_id, version)
+            version_info["metadata_refresh_attempted"] = now_iso
+            version_info["metadata_refresh_failed"] = True
+            self.stats.versions_failed += 1
+        elif result:
+            # Success with data!
+            self._total_metadata += len(result) - len(version_info.get("comfy_nodes") or [])
+            version_info["comfy_nodes"] = result
+            version_info["metadata_cached"] = True
+            version_info["metadata_refresh_attempted"] = now_iso
+            version_info["metadata_refresh_failed"] = False
+            logger.info("      ✅ %s@%s: fetched %d comfy-nodes", node_id, version, len(result))
+            self.stats.versions_with_data += 1
+            self.stats.total_metadata_entries += len(result)
+        else:
+            # Confirmed empty (legitimate)
+            self._total_metadata -= len(version_info.get("comfy_nodes") or [])
+            version_info["comfy_nodes"] = []
+            version_info["metadata_cached"] = True
+            version_info["metadata_refresh_attempted"] = now_iso
+            version_info["metadata_refresh_failed"] = False
+            logger.info("      ✅ %s@%s: confirmed empty (no metadata exists)", node_id, version)
+            self.stats.versions_confirmed_empty += 1
+
+    def _apply_deltas(self, nodes_list: List[dict], delta_file: Path) -> int:
+        """Apply checkpoint deltas to the loaded nodes in place.
+
+        Later lines win. A truncated trailing line from a crash mid-write is
+        skipped.
+
+        Returns:
+            Number of delta lines applied
+        """
+        nodes_by_id = {n["id"]: n for n in nodes_list}
+        applied = 0
+
+        with open(delta_file, 'rb') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    delta = json_utils.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning(f"Skipping corrupt checkpoint line in {delta_file}")
+                    continue
+
+                node = nodes_by_id.get(delta["id"])
+                if node is None:
+                    continue
+                node["versions_list"] = delta["versions_list"]
+                node["metadata_count"] = delta["metadata_count"]
+                applied += 1
+
+        return applied
+
+    def _save_checkpoint(self, output_file: Path):
+        """Append nodes modified since the last checkpoint to the delta log.
+
+        Checkpoints only record what changed, as one compact JSON line per
+        node in <output>.delta.jsonl; the full cache is written once by
+        _save_cache at the end of the run.
+        """
+        if not self._dirty_nodes:
+            return
 
+        delta_file = Path(str(output_file) + '.delta.jsonl')
+        delta_file.parent.mkdir(parents=True, exist_ok=True)
+
+        with open(delta_file, 'ab') as f:
+            for node_id, node in self._dirty_nodes.items():
+                f.write(json_utils.dumps({
+                    "id": node_id,
+                    "versions_list": node.get("versions_list", []),
+                    "metadata_count": node.get("metadata_count", 0)
+                }) + b'\n')
+            # Make the checkpoint durable before we consider it saved
+            f.flush()
+            os.fsync(f.fileno())
+
+        logger.debug(f"Checkpoint: {len(self._dirty_nodes)} nodes appended to {delta_file}")
+        self._dirty_nodes.clear()
+
+    def _save_cache(self, cache_data: dict, output_file: Path, is_checkpoint: bool = False):
+        """Save cache atomically.
+
+        Args:
+            cache_data: Full cache document
+            output_file: Destination path
+            is_checkpoint: Intermediate save; written compact and without fsync
+        """
+        try:
+            # Update top-level stats from the running totals
+            if not is_checkpoint and logger.isEnabledFor(DEBUG):
+                self._check_totals(cache_data["nodes"])
             cache_data["cached_at"] = datetime.now().isoformat()
-            cache_data["node_count"] = len(nodes)
-            cache_data["versions_processed"] = total_versions
-            cache_data["metadata_entries"] = total_metadata
+            cache_data["node_count"] = len(cache_data["nodes"])
+            cache_data["versions_processed"] = self._total_versions
+            cache_data["metadata_entries"] = self._total_metadata
 
             # Atomic write
             output_file.parent.mkdir(parents=True, exist_ok=True)
             temp_file = Path(str(output_file) + '.tmp')
 
             try:
-                with open(temp_file, 'w') as f:
-                    json.dump(cache_data, f, indent=2)
-                temp_file.replace(output_file)
-
-                file_size = output_file.stat().st_size / 1024 / 1024
-                logger.debug(f"Cache saved: {cache_data['node_count']} nodes, {file_size:.1f} MB")
-            finally:
-                if temp_file.exists():
-                    temp_file.unlink()
+                with open(temp_file, 'wb') as f:
+                    f.write(json_utils.dumps(cache_data, indent=not is_checkpoint))
+                    if not is_checkpoint:
+                        # Only the final snapshot needs to be durable before the rename
+                        f.flush()
+                        os.fsync(f.fileno())
+                os.replace(temp_file, output_file)
+            except Exception:
+                temp_file.unlink(missing_ok=True)
+                raise
+
+            file_size = output_file.stat().st_size / 1024 / 1024
+            logger.debug(f"Cache saved: {cache_data['node_count']} nodes, {file_size:.1f} MB")
+
+            # Full snapshot supersedes any checkpoint deltas
+            self._dirty_nodes.clear()
+            Path(str(output_file) + '.delta.jsonl').unlink(missing_ok=True)
 
         except Exception as e:
             logger.error(f"Failed to save cache: {e}")
             raise
 
+    def _check_totals(self, nodes_list: List[dict]):
+        """Recompute cache totals and resync the running counters if they drifted (debug only).
+
+        Drift is logged rather than raised, so it never aborts the final save.
+        """
+        total_versions = sum(len(n.get("versions_list", [])) for n in nodes_list)
+        total_metadata = sum(
+            len(v.get("comfy_nodes") or [])
+            for n in nodes_list
+            for v in n.get("versions_list", [])
+        )
+        if (total_versions, total_metadata) != (self._total_versions, self._total_metadata):
+            logger.warning(
+                "Running totals out of sync (versions %d != %d, metadata %d != %d), using recomputed values",
+                self._total_versions, total_versions, self._total_metadata, total_metadata
+            )
+            self._total_versions = total_versions
+            self._total_metadata = total_metadata
+
     def _print_summary(self, elapsed: float):
         """Print refresh summary."""
         logger.info("=" * 60)
         logger.info("📊 REFRESH SUMMARY")
         logger.info("=" * 60)
-        logger.info(f"Nodes processed: {self.stats['nodes_processed']}")
-        logger.info(f"Versions attempted: {self.stats['versions_attempted']}")
-        logger.info(f"  - With data: {self.stats['versions_with_data']}")
-        logger.info(f"  - Confirmed empty: {self.stats['versions_confirmed_empty']}")
-        logger.info(f"  - Failed: {self.stats['versions_failed']}")
-        logger.info(f"Total metadata entries fetched: {self.stats['total_metadata_entries']}")
+        logger.info(f"Nodes processed: {self.stats.nodes_processed}")
+        logger.info(f"Versions attempted: {self.stats.versions_attempted}")
+        logger.info(f"  - With data: {self.stats.versions_with_data}")
+        logger.info(f"  - Confirmed empty: {self.stats.versions_confirmed_empty}")
+        logger.info(f"  - Failed: {self.stats.versions_failed}")
+        logger.info(f"Total metadata entries fetched: {self.stats.total_metadata_entries}")
         logger.info(f"Time elapsed: {elapsed:.1f}s")
         logger.info("=" * 60)
 
@@ -254,12 +411,14 @@ Examples:
     --output data/full_registry_cache_refreshed.json \\
     --nodes comfyui_fill-nodes
 
-  # Refresh top 100 nodes
+  # Refresh top 100 nodes (checkpoints are appended to
+  # full_registry_cache_refreshed.json.delta.jsonl until the final save)
   uv run src/refresh_metadata.py \\
     --cache data/full_registry_cache.json \\
     --output data/full_registry_cache_refreshed.json \\
     --max-nodes 100 \\
-    --delay 0.5
+    --delay 0.5 \\
+    --concurrency 8
         """
     )
 
@@ -295,13 +454,30 @@ Examples:
         "--delay",
         type=float,
         default=0.5,
-        help="Delay between API requests in seconds (default: 0.5)"
+        help="Initial delay between API requests in seconds; the rate then adapts to responses (default: 0.5)"
+    )
+    parser.add_argument(
+        "--max-rate",
+        type=float,
+        default=20.0,
+        help="Upper bound on the adaptive request rate in requests/sec (default: 20)"
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=8,
+        help="Max in-flight metadata requests (default: 8)"
     )
     parser.add_argument(
         "--checkpoint-interval",
         type=int,
         default=10,
-        help="Save checkpoint every N nodes (default: 10)"
+        help="Append a checkpoint delta every N nodes (default: 10)"
+    )
+    parser.add_argument(
+        "--no-delta",
+        action="store_true",
+        help="Checkpoint by rewriting the full output file instead of appending deltas"
     )
     parser.add_argument(
         "--no-force-empty",
@@ -328,7 +504,10 @@ Examples:
         delay_seconds=args.delay,
         checkpoint_interval=args.checkpoint_interval,
         max_versions=args.max_versions,
-        max_retries=5
+        max_retries=5,
+        concurrency=args.concurrency,
+        max_rate=args.max_rate,
+        use_delta=not args.no_delta
     )
 
     asyncio.run(
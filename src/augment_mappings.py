@@ -14,19 +14,24 @@ BEHAVIOR:
 
 HOW IT WORKS:
 1. Loads existing node_mappings.json and extension-node-map.json
-2. First pass: Augments registry packages with Manager node data
-3. Second pass: Creates synthetic packages for Manager-only extensions
-4. Re-ranks all mappings based on package scores
+2. For each Manager extension, augments the matching registry package with its
+   node data, or creates a synthetic package if the extension is Manager-only
+3. Re-ranks all mappings based on package scores
 """
 
 import argparse
-import json
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict
+from typing import Dict, List, Set, Tuple
 from urllib.parse import urlparse, urlunparse
 
 from comfydock_core.utils.input_signature import create_node_key
+import json_utils
 from build_global_mappings import calculate_package_score
 from url_utils import (
     normalize_repository_url,
@@ -37,32 +42,83 @@ from logging import getLogger
 
 logger = getLogger(__name__)
 
+# Manager only lists node names, so all of its keys use the "_" (no inputs)
+# signature. Node names recur across extensions; build each key once.
+MANAGER_INPUT_SIGNATURE = "_"
+
+
+@lru_cache(maxsize=None)
+def _manager_node_key(node_type: str) -> str:
+    """Node key for a Manager node name."""
+    return create_node_key(node_type, MANAGER_INPUT_SIGNATURE)
+
+# Score cache installed in each rerank worker process by _init_rerank_worker
+_worker_score_cache: Dict[str, float] = {}
+
+
+def _rank_entries(entries: List[Dict], score_cache: Dict[str, float]):
+    """Sort entries by package score (highest first) and assign ranks in place."""
+    if len(entries) == 1:
+        # Most node keys map to a single package; nothing to sort
+        entries[0]['rank'] = 1
+        return
+    entries.sort(key=lambda x: score_cache[x['package_id']], reverse=True)
+    for rank, entry in enumerate(entries, 1):
+        entry['rank'] = rank
+
+
+def _init_rerank_worker(score_cache: Dict[str, float]):
+    """Receive the read-only score cache once per worker process."""
+    global _worker_score_cache
+    _worker_score_cache = score_cache
+
+
+def _rank_chunk(chunk: List[Tuple[str, List[Dict]]]) -> List[Tuple[str, List[Dict]]]:
+    """Rank a shard of (node_key, entries) pairs in a worker process."""
+    for _, entries in chunk:
+        _rank_entries(entries, _worker_score_cache)
+    return chunk
+
+
+@dataclass(slots=True)
+class AugmentStats:
+    """Counters and package sets collected during augmentation."""
+    nodes_added: int = 0
+    nodes_skipped_exists: int = 0
+    packages_augmented: Set[str] = field(default_factory=set)
+    packages_not_found: Set[str] = field(default_factory=set)
+    synthetic_packages_created: Set[str] = field(default_factory=set)
+    total_manager_nodes: int = 0
+
 
 class MappingsAugmenter:
     """Augments node mappings with ComfyUI Manager data."""
 
+    __slots__ = ('mappings_file', 'manager_file', 'mappings_data', 'manager_data', '_score_cache', 'stats')
+
     def __init__(self, mappings_file: Path, manager_file: Path):
         self.mappings_file = mappings_file
         self.manager_file = manager_file
         self.mappings_data = None
         self.manager_data = None
-        self.stats = {
-            'nodes_added': 0,
-            'nodes_skipped_exists': 0,
-            'packages_augmented': set(),
-            'packages_not_found': set(),
-            'synthetic_packages_created': set(),
-            'total_manager_nodes': 0
-        }
+        self._score_cache: Dict[str, float] = {}  # package_id -> popularity score
+        self.stats = AugmentStats()
 
     def load_data(self):
         """Load both data files."""
-        with open(self.mappings_file, 'r') as f:
-            self.mappings_data = json.load(f)
+        self.mappings_data = json_utils.load(self.mappings_file)
         logger.info(f"Loaded {len(self.mappings_data['mappings'])} mappings, {len(self.mappings_data['packages'])} packages")
 
-        with open(self.manager_file, 'r') as f:
-            manager_raw = json.load(f)
+        # Score each package once; entries reference packages many times over
+        self._score_cache = {
+            package_id: calculate_package_score(
+                package_info.get('downloads', 0),
+                package_info.get('github_stars', 0)
+            )
+            for package_id, package_info in self.mappings_data['packages'].items()
+        }
+
+        manager_raw = json_utils.load(self.manager_file)
 
         if isinstance(manager_raw, dict) and "extensions" in manager_raw:
             self.manager_data = manager_raw["extensions"]
@@ -86,8 +142,14 @@ class MappingsAugmenter:
         logger.info(f"Built URL map with {len(url_map)} repositories")
         return url_map
 
-    def create_synthetic_package(self, repo_url: str, extension_data: list):
-        """Create a synthetic package entry for a Manager-only extension."""
+    def create_synthetic_package(self, repo_url: str, extension_data: list, created_at: str = None):
+        """Create a synthetic package entry for a Manager-only extension.
+
+        Args:
+            repo_url: Manager extension repository URL
+            extension_data: Manager [node_list, metadata] entry
+            created_at: ISO timestamp to stamp on the package (defaults to now)
+        """
         normalized_url = normalize_repository_url(repo_url)
         package_id = generate_manager_package_id(normalized_url)
 
@@ -117,33 +179,38 @@ class MappingsAugmenter:
             'icon': '',
             'tags': [],
             'status': 'NodeStatusActive',
-            'created_at': datetime.now().isoformat(),
+            'created_at': created_at or datetime.now().isoformat(),
             'source': 'manager',
             'versions': {}
         }
+        self._score_cache[package_id] = calculate_package_score(0, 0)
 
-        self.stats['synthetic_packages_created'].add(package_id)
-        logger.info(f"Created synthetic package: {package_id}")
+        self.stats.synthetic_packages_created.add(package_id)
+        logger.info("Created synthetic package: %s", package_id)
         return package_id
 
-    def augment_mappings(self):
-        """Augment mappings with Manager data."""
+    def augment_mappings(self, parallel_rerank: bool = False):
+        """Augment mappings with Manager data.
+
+        Args:
+            parallel_rerank: Sort mapping entries in a process pool (worth it for large mapping files)
+        """
         url_to_package = self.build_url_to_package_map()
-        packages_not_found = {}
+        now_iso = datetime.now().isoformat()  # one timestamp for all synthetic packages
 
-        # First pass: Process extensions that exist in registry
+        # node_key -> package_ids already mapped, for O(1) duplicate checks
+        seen: Dict[str, Set[str]] = {
+            node_key: {entry['package_id'] for entry in entries}
+            for node_key, entries in self.mappings_data['mappings'].items()
+        }
+
+        # Single pass: augment registry packages, or create synthetic
+        # packages for Manager-only extensions
         for repo_url, extension_data in self.manager_data.items():
             # Skip unsupported repository types
             if not is_supported_repo_url(repo_url):
                 continue
 
-            normalized_url = normalize_repository_url(repo_url)
-            package_id = url_to_package.get(normalized_url)
-
-            if not package_id:
-                packages_not_found[repo_url] = extension_data
-                continue
-
             if not isinstance(extension_data, list) or len(extension_data) < 1:
                 continue
 
@@ -151,137 +218,99 @@ class MappingsAugmenter:
             if not isinstance(node_list, list):
                 continue
 
-            self.stats['total_manager_nodes'] += len(node_list)
-
-            nodes_added_for_package = 0
-            for node_type in node_list:
-                if not isinstance(node_type, str):
-                    continue
-
-                node_key = create_node_key(node_type, "_")
-
-                # Check if this package already has an entry for this node
-                if node_key in self.mappings_data['mappings']:
-                    entries = self.mappings_data['mappings'][node_key]
-                    existing_entry = None
-                    for entry in entries:
-                        if entry['package_id'] == package_id:
-                            existing_entry = entry
-                            break
-
-                    if existing_entry:
-                        self.stats['nodes_skipped_exists'] += 1
-                        continue
-
-                # Add new entry for this package
-                if node_key not in self.mappings_data['mappings']:
-                    self.mappings_data['mappings'][node_key] = []
-
-                package_info = self.mappings_data['packages'][package_id]
-                score = calculate_package_score(
-                    package_info.get('downloads', 0),
-                    package_info.get('github_stars', 0)
-                )
-
-                self.mappings_data['mappings'][node_key].append({
-                    'package_id': package_id,
-                    'versions': [],
-                    '_temp_score': score,
-                    'rank': 0,  # Will be re-ranked later
-                    'source': 'manager'
-                })
-
-                self.stats['nodes_added'] += 1
-                nodes_added_for_package += 1
-                logger.debug(f"Added {node_type} -> {package_id}")
-
-            if nodes_added_for_package > 0:
-                self.stats['packages_augmented'].add(package_id)
-                logger.info(f"Augmented {package_id} with {nodes_added_for_package} nodes")
-
-        # Second pass: Create synthetic packages for Manager-only extensions
-        logger.info(f"Creating synthetic packages for {len(packages_not_found)} Manager-only extensions...")
-        for repo_url, extension_data in packages_not_found.items():
-            if not isinstance(extension_data, list) or len(extension_data) < 1:
-                continue
-
-            node_list = extension_data[0]
-            if not isinstance(node_list, list):
+            package_id = url_to_package.get(normalize_repository_url(repo_url))
+            if package_id:
+                nodes_added = self._add_nodes_for_package(package_id, node_list, seen)
+                if nodes_added > 0:
+                    self.stats.packages_augmented.add(package_id)
+                    logger.info("Augmented %s with %d nodes", package_id, nodes_added)
                 continue
 
-            package_id = self.create_synthetic_package(repo_url, extension_data)
+            package_id = self.create_synthetic_package(repo_url, extension_data, created_at=now_iso)
             if not package_id:
-                self.stats['packages_not_found'].add(repo_url)
+                self.stats.packages_not_found.add(repo_url)
                 continue
 
-            self.stats['total_manager_nodes'] += len(node_list)
-
-            nodes_added_for_package = 0
-            for node_type in node_list:
-                if not isinstance(node_type, str):
-                    continue
-
-                node_key = create_node_key(node_type, "_")
-
-                # Check if this package already has an entry
-                if node_key in self.mappings_data['mappings']:
-                    entries = self.mappings_data['mappings'][node_key]
-                    existing_entry = None
-                    for entry in entries:
-                        if entry['package_id'] == package_id:
-                            existing_entry = entry
-                            break
-
-                    if existing_entry:
-                        self.stats['nodes_skipped_exists'] += 1
-                        continue
-
-                # Add entry for synthetic package
-                if node_key not in self.mappings_data['mappings']:
-                    self.mappings_data['mappings'][node_key] = []
-
-                package_info = self.mappings_data['packages'][package_id]
-                score = calculate_package_score(
-                    package_info.get('downloads', 0),
-                    package_info.get('github_stars', 0)
-                )
-
-                self.mappings_data['mappings'][node_key].append({
-                    'package_id': package_id,
-                    'versions': [],
-                    '_temp_score': score,
-                    'rank': 0,
-                    'source': 'manager'
-                })
-
-                self.stats['nodes_added'] += 1
-                nodes_added_for_package += 1
-                logger.debug(f"Added {node_type} -> synthetic {package_id}")
-
-            if nodes_added_for_package > 0:
-                logger.info(f"Synthetic package {package_id} mapped {nodes_added_for_package} nodes")
+            nodes_added = self._add_nodes_for_package(package_id, node_list, seen)
+            if nodes_added > 0:
+                logger.info("Synthetic package %s mapped %d nodes", package_id, nodes_added)
 
         # Re-rank all mappings
-        self._rerank_all_mappings()
-
-    def _rerank_all_mappings(self):
-        """Re-rank all package entries based on scores."""
-        for node_key, entries in self.mappings_data['mappings'].items():
-            # Calculate scores for entries that don't have them yet (Registry entries)
-            for entry in entries:
-                if '_temp_score' not in entry:
-                    pkg = self.mappings_data['packages'][entry['package_id']]
-                    score = calculate_package_score(
-                        pkg.get('downloads', 0),
-                        pkg.get('github_stars', 0)
-                    )
-                    entry['_temp_score'] = score
-
-            # Sort and rank
-            entries.sort(key=lambda x: x['_temp_score'], reverse=True)
-            for rank, entry in enumerate(entries, 1):
-                entry['rank'] = rank
-                del entry['_temp_score']  # Remove score from output
+        del seen
+        self._rerank_all_mappings(parallel=parallel_rerank)
+
+    def _add_nodes_for_package(self, package_id: str, node_list: list, seen: Dict[str, Set[str]]) -> int:
+        """Add Manager node entries for a package, skipping ones already mapped.
+
+        Args:
+            package_id: Registry or synthetic package ID
+            node_list: Node names listed by Manager for the extension
+            seen: node_key -> package_ids already mapped (updated in place)
+
+        Returns:
+            Number of entries added
+        """
+        mappings = self.mappings_data['mappings']
+        make_key = _manager_node_key
+        self.stats.total_manager_nodes += len(node_list)
+
+        nodes_added = 0
+        for node_type in node_list:
+            if not isinstance(node_type, str):
+                continue
+
+            node_key = make_key(node_type)
+
+            # Check if this package already has an entry for this node
+            if package_id in seen.get(node_key, ()):
+                self.stats.nodes_skipped_exists += 1
+                continue
+
+            # Add new entry for this package
+            if node_key not in mappings:
+                mappings[node_key] = []
+            seen.setdefault(node_key, set()).add(package_id)
+
+            mappings[node_key].append({
+                'package_id': package_id,
+                'versions': [],
+                'rank': 0,  # Will be re-ranked later
+                'source': 'manager'
+            })
+
+            nodes_added += 1
+            logger.debug("Added %s -> %s", node_type, package_id)
+
+        self.stats.nodes_added += nodes_added
+        return nodes_added
+
+    def _rerank_all_mappings(self, parallel: bool = False):
+        """Re-rank all package entries based on scores.
+
+        Args:
+            parallel: Shard node keys across one worker process per CPU
+        """
+        mappings = self.mappings_data['mappings']
+
+        if parallel and mappings:
+            items = list(mappings.items())
+            workers = os.cpu_count() or 1
+            chunk_size = -(-len(items) // workers)
+            chunks = [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_rerank_worker,
+                initargs=(self._score_cache,)
+            ) as executor:
+                results = executor.map(_rank_chunk, chunks)
+                self.mappings_data['mappings'] = dict(itertools.chain.from_iterable(results))
+
+            logger.info(f"Re-ranked {len(items)} mappings across {len(chunks)} worker processes")
+            return
+
+        for entries in mappings.values():
+            _rank_entries(entries, self._score_cache)
 
     def save_augmented_mappings(self, output_file: Path, schema_config: Path = None):
         """Save the augmented mappings.
@@ -292,10 +321,10 @@ class MappingsAugmenter:
         """
         self.mappings_data['stats']['augmented'] = True
         self.mappings_data['stats']['augmentation_date'] = datetime.now().isoformat()
-        self.mappings_data['stats']['nodes_from_manager'] = self.stats['nodes_added']
+        self.mappings_data['stats']['nodes_from_manager'] = self.stats.nodes_added
         self.mappings_data['stats']['signatures'] = len(self.mappings_data['mappings'])
         self.mappings_data['stats']['packages'] = len(self.mappings_data['packages'])
-        self.mappings_data['stats']['synthetic_packages'] = len(self.stats['synthetic_packages_created'])
+        self.mappings_data['stats']['synthetic_packages'] = len(self.stats.synthetic_packages_created)
 
         # Count total node entries (sum of all list lengths)
         total_nodes = sum(len(entries) for entries in self.mappings_data['mappings'].values())
@@ -304,18 +333,15 @@ class MappingsAugmenter:
         # Sort mappings for deterministic output
         self.mappings_data['mappings'] = dict(sorted(self.mappings_data['mappings'].items()))
 
-        # Apply schema filter if provided
-        if schema_config and schema_config.exists():
-            from schema_filter import SchemaFilter
-            filter = SchemaFilter(schema_config)
-            self.mappings_data = filter.filter_mappings_output(self.mappings_data)
-            logger.info(f"Applied schema filter from {schema_config}")
-
-        # Atomic write
+        # Atomic write, applying the schema filter (if provided) while streaming
         temp_file = Path(str(output_file) + '.tmp')
         try:
-            with open(temp_file, 'w') as f:
-                json.dump(self.mappings_data, f, indent=2)
+            if schema_config and schema_config.exists():
+                from schema_filter import SchemaFilter
+                SchemaFilter(schema_config).dump_filtered(self.mappings_data, temp_file)
+                logger.info(f"Applied schema filter from {schema_config}")
+            else:
+                json_utils.dump_streaming(self.mappings_data, temp_file, stream_keys=("mappings", "packages"))
             temp_file.replace(output_file)
             logger.info(f"Saved augmented mappings to {output_file}")
         finally:
@@ -327,20 +353,20 @@ class MappingsAugmenter:
         print("\n" + "=" * 60)
         print("📊 AUGMENTATION SUMMARY")
         print("=" * 60)
-        print(f"Total Manager nodes processed: {self.stats['total_manager_nodes']}")
-        print(f"Nodes added: {self.stats['nodes_added']}")
-        print(f"Nodes skipped (already exists): {self.stats['nodes_skipped_exists']}")
-        print(f"Registry packages augmented: {len(self.stats['packages_augmented'])}")
-        print(f"Synthetic packages created: {len(self.stats['synthetic_packages_created'])}")
-        print(f"Packages failed to process: {len(self.stats['packages_not_found'])}")
+        print(f"Total Manager nodes processed: {self.stats.total_manager_nodes}")
+        print(f"Nodes added: {self.stats.nodes_added}")
+        print(f"Nodes skipped (already exists): {self.stats.nodes_skipped_exists}")
+        print(f"Registry packages augmented: {len(self.stats.packages_augmented)}")
+        print(f"Synthetic packages created: {len(self.stats.synthetic_packages_created)}")
+        print(f"Packages failed to process: {len(self.stats.packages_not_found)}")
         print("=" * 60)
 
-        if self.stats['synthetic_packages_created']:
-            print(f"\n✨ Created {len(self.stats['synthetic_packages_created'])} synthetic packages from Manager-only extensions")
+        if self.stats.synthetic_packages_created:
+            print(f"\n✨ Created {len(self.stats.synthetic_packages_created)} synthetic packages from Manager-only extensions")
 
-        if self.stats['packages_not_found'] and logger.isEnabledFor(10):
+        if self.stats.packages_not_found and logger.isEnabledFor(10):
             print("\nPackages that couldn't be processed (first 10):")
-            for url in list(self.stats['packages_not_found'])[:10]:
+            for url in list(self.stats.packages_not_found)[:10]:
                 print(f"  - {url}")
 
 
@@ -369,6 +395,11 @@ def main():
         default=Path('config/output_schema.toml'),
         help='Schema configuration file (default: config/output_schema.toml)'
     )
+    parser.add_argument(
+        '--parallel-rerank',
+        action='store_true',
+        help='Re-rank mappings in a process pool (faster for large mapping files)'
+    )
     parser.add_argument(
         '--log-level',
         default='INFO',
@@ -387,7 +418,7 @@ def main():
 
     augmenter = MappingsAugmenter(args.mappings, args.manager)
     augmenter.load_data()
-    augmenter.augment_mappings()
+    augmenter.augment_mappings(parallel_rerank=args.parallel_rerank)
     augmenter.save_augmented_mappings(args.output, schema_config=args.schema_config)
     augmenter.print_summary()
 
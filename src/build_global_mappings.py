@@ -2,22 +2,40 @@
 """Build global node mappings from cached registry data."""
 
 import argparse
+import itertools
 import json
+import re
+import sys
 import time
-from datetime import datetime, timezone
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field, fields
+from datetime import date, datetime, timezone
+from functools import lru_cache
+from operator import itemgetter
 from pathlib import Path
-from typing import Dict, List
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
 
 from comfydock_core.utils.input_signature import (
     create_node_key,
     normalize_registry_inputs,
 )
+import json_utils
 from url_utils import normalize_repository_url
 
 from logging import getLogger
 
 logger = getLogger(__name__)
 
+# Nodes per work unit when building with multiple processes
+SHARD_SIZE = 500
+
+# Registry dates are ISO 8601 ('2024-05-01T12:00:00Z'); only the day matters
+_DATE_RE = re.compile(r'^(\d{4})-(\d{2})-(\d{2})')
+
+# Plain "X.Y.Z", optionally followed by a pre-release/build suffix
+_VERSION_RE = re.compile(r'(\d+)\.(\d+)\.(\d+)(?:[-+]|$)')
+
 
 def calculate_package_score(downloads: int, github_stars: int) -> float:
     """Calculate popularity score for package ranking.
@@ -36,52 +54,223 @@ def calculate_package_score(downloads: int, github_stars: int) -> float:
     return max(score, 0.1)  # Ensure minimum score
 
 
+def recency_multiplier(days_old: int) -> float:
+    """Step-function score multiplier for a package whose latest release is days_old."""
+    if days_old < 90:
+        return 1.0
+    elif days_old < 180:
+        return 0.95
+    elif days_old < 365:
+        return 0.85
+    elif days_old < 730:
+        return 0.70
+    else:
+        return 0.50
+
+
+@lru_cache(maxsize=None)
+def _parse_version(version_str: str) -> tuple:
+    """Parse version string for sorting.
+
+    Returns tuple of integers for proper semantic version sorting.
+    Examples: "1.2.3" -> (1, 2, 3), "2.0.0-beta1" -> (2, 0, 0)
+
+    Cached because the same version strings recur across packages.
+    """
+    m = _VERSION_RE.match(version_str)
+    if m:
+        return (int(m[1]), int(m[2]), int(m[3]))
+    return _slow_parse_version(version_str)
+
+
+def _slow_parse_version(version_str: str) -> tuple:
+    """General _parse_version fallback for versions not shaped like "X.Y.Z"."""
+    # Remove any pre-release suffixes
+    base_version = version_str.split('-')[0].split('+')[0]
+
+    try:
+        parts = []
+        for part in base_version.split('.'):
+            try:
+                parts.append(int(part))
+            except ValueError:
+                parts.append(0)
+        # Pad with zeros to ensure consistent length
+        while len(parts) < 3:
+            parts.append(0)
+        return tuple(parts)
+    except Exception:
+        return (0, 0, 0)
+
+
+@lru_cache(maxsize=200_000)
+def _normalize_inputs(input_types_str: str) -> str:
+    """Normalize a registry input_types JSON string, or "" if it can't be parsed.
+
+    Cached because identical node schemas repeat across versions and packages.
+    """
+    try:
+        return normalize_registry_inputs(input_types_str)
+    except Exception as e:
+        logger.debug(f"Failed to normalize inputs {input_types_str[:80]!r}: {e}")
+        return ""
+
+
+@lru_cache(maxsize=500_000)
+def _node_key(display_name: str, normalized_inputs: str) -> str:
+    """Cached create_node_key."""
+    return create_node_key(display_name, normalized_inputs)
+
+
+def _intern(value):
+    """Intern low-cardinality strings so equal values share one object."""
+    return sys.intern(value) if type(value) is str else value
+
+
+@dataclass(slots=True)
+class VersionMeta:
+    """Version metadata stored under a package while building."""
+    version: str
+    changelog: str
+    release_date: str
+    dependencies: list
+    deprecated: bool
+    download_url: str
+    status: str
+    supported_accelerators: Optional[list]
+    supported_comfyui_version: str
+    supported_os: Optional[list]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in _VERSION_FIELDS}
+
+
+@dataclass(slots=True)
+class PackageMeta:
+    """Package metadata built from a registry cache node.
+
+    Slotted instead of a dict to keep per-package memory small; converted to
+    plain dicts once the build is finished.
+    """
+    display_name: str
+    author: str
+    description: str
+    repository: str
+    downloads: int
+    github_stars: int
+    rating: float
+    license: str
+    category: str
+    icon: str
+    tags: list
+    status: str
+    created_at: str
+    versions: Dict[str, Union[VersionMeta, Dict]] = field(default_factory=dict)  # version -> metadata
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {name: getattr(self, name) for name in _PACKAGE_FIELDS}
+        data["versions"] = {
+            version: meta.to_dict() if isinstance(meta, VersionMeta) else meta
+            for version, meta in self.versions.items()
+        }
+        return data
+
+
+_VERSION_FIELDS = tuple(f.name for f in fields(VersionMeta))
+_PACKAGE_FIELDS = tuple(f.name for f in fields(PackageMeta))
+
+
+def _build_shard(nodes: List[Dict], now: datetime) -> Tuple[Dict, Dict, int, int]:
+    """Process a contiguous shard of cache nodes in a worker process.
+
+    Returns:
+        (mappings, packages, total_nodes, node_count) built from the shard alone
+    """
+    builder = GlobalMappingsBuilder()
+    for node in nodes:
+        builder._process_node(node, now)
+    return builder.mappings, builder.packages, builder.total_nodes, len(nodes)
+
+
 class GlobalMappingsBuilder:
     """Builds global node mappings from cached registry data."""
 
     def __init__(self):
-        self.mappings = {}  # node_key -> [{"package_id", "versions", "score", "rank"}]
-        self.packages = {}  # package_id -> package metadata
+        # node_key -> {package_id: {"package_id", "versions", "_temp_score", "rank"}} while
+        # building, with "versions" as an insertion-ordered dict used as a set;
+        # _rank_all_mappings turns each into a ranked list of entries
+        self.mappings = {}
+        # package_id -> PackageMeta for packages built in this run; packages
+        # loaded from existing mappings stay plain dicts
+        self.packages = {}
         self.total_nodes = 0
         self.total_signatures = 0
+        self._latest_release: Dict[str, Tuple[int, int, int]] = {}  # package_id -> newest (y, m, d) release date
+        self._incremental = False  # True when merging into existing mappings
 
-    def build_mappings(self, registry_cache: Path, existing_mappings: Path = None) -> Dict:
-        """Build mappings from cached registry data with optional incremental support."""
+    def build_mappings(self, registry_cache: Path, existing_mappings: Path = None, workers: int = 1) -> Dict:
+        """Build mappings from cached registry data with optional incremental support.
+
+        Args:
+            registry_cache: Registry cache file
+            existing_mappings: Mappings file to merge into (incremental build)
+            workers: Processes for node processing (fresh builds only)
+        """
         start_time = time.time()
         logger.info("Starting mappings build from cache")
 
         # Load existing mappings if provided (for incremental updates)
-        if existing_mappings and existing_mappings.exists():
+        self._incremental = bool(existing_mappings and existing_mappings.exists())
+        if self._incremental:
             logger.info(f"Loading existing mappings from {existing_mappings}")
-            with open(existing_mappings, 'r') as f:
-                existing_data = json.load(f)
-                self.mappings = existing_data.get("mappings", {})
-                self.packages = existing_data.get("packages", {})
-                logger.info(f"Loaded {len(self.mappings)} existing mappings, {len(self.packages)} packages")
+            existing_data = json_utils.load(existing_mappings)
+            self.mappings = {
+                node_key: {
+                    entry["package_id"]: {**entry, "versions": dict.fromkeys(entry.get("versions", []))}
+                    for entry in entries
+                }
+                for node_key, entries in existing_data.get("mappings", {}).items()
+            }
+            self.packages = existing_data.get("packages", {})
+            for package_id, package_info in self.packages.items():
+                for version_data in package_info.get("versions", {}).values():
+                    self._track_release_date(package_id, version_data.get("release_date"))
+            logger.info(f"Loaded {len(self.mappings)} existing mappings, {len(self.packages)} packages")
 
         # Load registry cache
         if not registry_cache.exists():
             logger.error(f"Registry cache not found: {registry_cache}")
             return {}
 
-        with open(registry_cache, 'r') as f:
-            cache_data = json.load(f)
+        # Stream nodes one at a time instead of loading the whole cache
+        header, nodes = json_utils.iter_array(registry_cache, "nodes")
+        node_count = header.get("node_count", 0)
+        cached_at = header.get("cached_at", "")
+        metadata_entries = header.get("metadata_entries", 0)
 
-        nodes = cache_data.get("nodes", [])
-        cached_at = cache_data.get("cached_at", "")
-        metadata_entries = cache_data.get("metadata_entries", 0)
+        logger.info(f"Reading cache: {node_count} nodes, {metadata_entries} metadata entries (cached at: {cached_at})")
 
-        logger.info(f"Loaded cache: {len(nodes)} nodes, {metadata_entries} metadata entries (cached at: {cached_at})")
+        # Process all nodes (package ages are measured against a single "now")
+        now = datetime.now(timezone.utc)
+        if workers > 1 and not self.mappings and not self.packages:
+            processed = self._process_nodes_parallel(nodes, now, workers)
+        else:
+            if workers > 1:
+                logger.info("Incremental build: processing nodes in a single process")
+            # ~20 progress lines per build (node_count is 0 if the header lacks it)
+            log_step = max(100, node_count // 20)
+            processed = 0
+            for processed, node in enumerate(nodes, 1):
+                if processed % log_step == 0:
+                    logger.info("Processing node %d/%d...", processed, node_count)
 
-        # Process all nodes
-        for i, node in enumerate(nodes, 1):
-            if i % 100 == 0:
-                logger.info(f"Processing node {i}/{len(nodes)}...")
+                self._process_node(node, now)
 
-            self._process_node(node)
+        logger.info(f"Processed {processed} nodes from cache")
 
         # Finalize: rank all packages for each signature
         self._rank_all_mappings()
+        self._materialize_packages()
 
         # Build stats
         elapsed = time.time() - start_time
@@ -95,9 +284,10 @@ class GlobalMappingsBuilder:
         logger.info("=" * 60)
 
         # Return complete data structure
+        generated_at = datetime.now()
         return {
-            "version": datetime.now().strftime("%Y.%m.%d"),
-            "generated_at": datetime.now().isoformat(),
+            "version": generated_at.strftime("%Y.%m.%d"),
+            "generated_at": generated_at.isoformat(),
             "stats": {
                 "packages": len(self.packages),
                 "signatures": len(self.mappings),
@@ -107,101 +297,141 @@ class GlobalMappingsBuilder:
             "packages": self.packages
         }
 
-    def _process_node(self, node: Dict):
-        """Process a single node package from cache."""
+    def _process_nodes_parallel(self, nodes: Iterable[Dict], now: datetime, workers: int) -> int:
+        """Process nodes in contiguous shards across worker processes.
+
+        Shards are merged in order, so the result matches a sequential build
+        as long as package ids are unique in the cache.
+
+        Returns:
+            Number of nodes processed
+        """
+        processed = 0
+        shards = (list(batch) for batch in itertools.batched(nodes, SHARD_SIZE))
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # executor.map would drain the shard generator (and so the streamed
+            # cache) up front; keep a bounded window of shards in flight instead
+            pending = deque(
+                executor.submit(_build_shard, shard, now)
+                for shard in itertools.islice(shards, 2 * workers)
+            )
+            while pending:
+                mappings, packages, total_nodes, node_count = pending.popleft().result()
+                shard = next(shards, None)
+                if shard is not None:
+                    pending.append(executor.submit(_build_shard, shard, now))
+
+                for node_key, entries_by_package in mappings.items():
+                    existing = self.mappings.get(node_key)
+                    if existing is None:
+                        self.mappings[node_key] = entries_by_package
+                        self.total_signatures += 1
+                    else:
+                        existing.update(entries_by_package)
+                self.packages.update(packages)
+                self.total_nodes += total_nodes
+                processed += node_count
+                logger.info(f"Processed {processed} nodes...")
+
+        return processed
+
+    def _process_node(self, node: Dict, now: datetime):
+        """Process a single node package from cache.
+
+        Args:
+            node: Package entry from the registry cache
+            now: Reference time (UTC) for the recency multiplier
+        """
         package_id = node["id"]
+        get = node.get  # bound once; called for every field below
 
         # Store package metadata (only once per package)
-        if package_id not in self.packages:
-            self.packages[package_id] = {
-                "display_name": node.get("name", package_id),
-                "author": node.get("author", ""),
-                "description": node.get("description", ""),
-                "repository": normalize_repository_url(node.get("repository", "")),
-                "downloads": node.get("downloads", 0),
-                "github_stars": node.get("github_stars", 0),
-                "rating": node.get("rating", 0),
-                "license": node.get("license", ""),
-                "category": node.get("category", ""),
-                "icon": node.get("icon", ""),
-                "tags": node.get("tags", []),
-                "status": node.get("status", ""),
-                "created_at": node.get("created_at", ""),
-                "versions": {}  # version -> metadata
-            }
+        package_info = self.packages.get(package_id)
+        # In a fresh build, a package seen for the first time has no mapping entries yet
+        new_package = package_info is None and not self._incremental
+        if package_info is None:
+            package_info = self.packages[package_id] = PackageMeta(
+                display_name=get("name", package_id),
+                author=_intern(get("author", "")),
+                description=get("description", ""),
+                repository=normalize_repository_url(get("repository", "")),
+                downloads=get("downloads", 0),
+                github_stars=get("github_stars", 0),
+                rating=get("rating", 0),
+                license=_intern(get("license", "")),
+                category=_intern(get("category", "")),
+                icon=get("icon", ""),
+                tags=get("tags", []),
+                status=_intern(get("status", "")),
+                created_at=get("created_at", ""),
+            )
+
+        # Packages from existing mappings are dicts
+        is_meta = isinstance(package_info, PackageMeta)
 
         # Process versions
-        versions_list = node.get("versions_list", [])
+        versions_list = get("versions_list", [])
         if not versions_list:
             logger.debug(f"No versions for {package_id}")
             return
 
-        # Process each version
+        # Store every version first so the package's recency is known
+        # before any of its nodes are scored
+        package_versions = package_info.versions if is_meta else package_info["versions"]
         for version_info in versions_list:
+            vget = version_info.get
             version = version_info["version"]
 
-            # Skip deprecated versions for node mappings
-            skip_for_mappings = version_info.get("deprecated", False)
-
             # Store version metadata (excluding comfy_nodes)
-            version_metadata = {
-                "version": version,
-                "changelog": version_info.get("changelog", ""),
-                "release_date": version_info.get("createdAt", ""),
-                "dependencies": version_info.get("dependencies", []),
-                "deprecated": version_info.get("deprecated", False),
-                "download_url": version_info.get("download_url", version_info.get("downloadUrl", "")),
-                "status": version_info.get("status", ""),
-                "supported_accelerators": version_info.get("supported_accelerators"),
-                "supported_comfyui_version": version_info.get("supported_comfyui_version", ""),
-                "supported_os": version_info.get("supported_os")
-            }
+            version_metadata = VersionMeta(
+                version=version,
+                changelog=vget("changelog", ""),
+                release_date=vget("createdAt", ""),
+                dependencies=vget("dependencies", []),
+                deprecated=vget("deprecated", False),
+                download_url=vget("download_url", vget("downloadUrl", "")),
+                status=_intern(vget("status", "")),
+                supported_accelerators=vget("supported_accelerators"),
+                supported_comfyui_version=_intern(vget("supported_comfyui_version", "")),
+                supported_os=vget("supported_os")
+            )
 
             # Add to package versions
-            self.packages[package_id]["versions"][version] = version_metadata
+            package_versions[version] = version_metadata
+            self._track_release_date(package_id, version_metadata.release_date)
+
+        # Score the package once; every comfy-node entry it creates reuses it
+        if is_meta:
+            downloads, github_stars = package_info.downloads, package_info.github_stars
+        else:
+            downloads, github_stars = package_info.get("downloads", 0), package_info.get("github_stars", 0)
+        score = calculate_package_score(downloads, github_stars) * self._calculate_recency_multiplier(package_id, now)
 
-            # Process comfy-nodes metadata for mappings (skip deprecated versions)
-            if not skip_for_mappings:
-                comfy_nodes = version_info.get("comfy_nodes", [])
-                if comfy_nodes:
-                    self._process_comfy_nodes(package_id, version, comfy_nodes)
+        # Process comfy-nodes metadata for mappings (skip deprecated versions)
+        for version_info in versions_list:
+            if version_info.get("deprecated", False):
+                continue
+            comfy_nodes = version_info.get("comfy_nodes", [])
+            if comfy_nodes:
+                self._process_comfy_nodes(package_id, version_info["version"], comfy_nodes, score, new_package)
+                new_package = False
 
         # Sort versions dictionary by version number (highest first)
-        versions_dict = self.packages[package_id]["versions"]
-        sorted_versions = sorted(
-            versions_dict.items(),
-            key=lambda x: self._parse_version(x[0]),
+        sorted_versions = dict(sorted(
+            package_versions.items(),
+            key=lambda x: _parse_version(x[0]),
             reverse=True
-        )
-        self.packages[package_id]["versions"] = dict(sorted_versions)
-
-    def _parse_version(self, version_str: str) -> tuple:
-        """Parse version string for sorting.
-
-        Returns tuple of integers for proper semantic version sorting.
-        Examples: "1.2.3" -> (1, 2, 3), "2.0.0-beta1" -> (2, 0, 0)
-        """
-        # Remove any pre-release suffixes
-        base_version = version_str.split('-')[0].split('+')[0]
-
-        try:
-            parts = []
-            for part in base_version.split('.'):
-                try:
-                    parts.append(int(part))
-                except ValueError:
-                    parts.append(0)
-            # Pad with zeros to ensure consistent length
-            while len(parts) < 3:
-                parts.append(0)
-            return tuple(parts)
-        except Exception:
-            return (0, 0, 0)
+        ))
+        if is_meta:
+            package_info.versions = sorted_versions
+        else:
+            package_info["versions"] = sorted_versions
 
-    def _calculate_recency_multiplier(self, package_id: str) -> float:
+    def _calculate_recency_multiplier(self, package_id: str, now: datetime) -> float:
         """Calculate recency multiplier based on package age (0.5 to 1.0).
 
-        Uses latest version date to determine package freshness:
+        Uses latest version date (tracked during ingestion) to determine package freshness:
         - 0-90 days: 1.0 (no penalty)
         - 90-180 days: 0.95 (5% penalty)
         - 180-365 days: 0.85 (15% penalty)
@@ -210,120 +440,126 @@ class GlobalMappingsBuilder:
 
         Args:
             package_id: Package identifier
+            now: Reference time (UTC) to measure package age against
 
         Returns:
             Multiplier between 0.5 and 1.0
         """
-        package_info = self.packages[package_id]
-        versions = package_info.get("versions", {})
-
-        if not versions:
-            return 1.0  # No penalty if no version data
-
-        # Find most recent version date
-        latest_date = None
-        for version_data in versions.values():
-            release_date = version_data.get("release_date")
-            if release_date:
-                try:
-                    dt = datetime.fromisoformat(release_date.replace('Z', '+00:00'))
-                    if latest_date is None or dt > latest_date:
-                        latest_date = dt
-                except:
-                    pass
-
+        latest_date = self._latest_release.get(package_id)
         if latest_date is None:
-            return 1.0  # No penalty if can't parse dates
+            return 1.0  # No penalty if no parseable version dates
 
-        # Calculate age
-        now = datetime.now(timezone.utc)
-        days_old = (now - latest_date).days
-
-        # Step function penalty
-        if days_old < 90:
-            return 1.0
-        elif days_old < 180:
-            return 0.95
-        elif days_old < 365:
-            return 0.85
-        elif days_old < 730:
-            return 0.70
-        else:
-            return 0.50
+        # Step function penalty on age, in calendar days
+        return recency_multiplier(now.toordinal() - date(*latest_date).toordinal())
 
-    def _process_comfy_nodes(self, package_id: str, version: str, comfy_nodes: List[Dict]):
-        """Process comfy-nodes metadata and create mappings."""
-        # Get package stats for scoring
-        package_info = self.packages[package_id]
-        downloads = package_info.get("downloads", 0)
-        github_stars = package_info.get("github_stars", 0)
-        base_score = calculate_package_score(downloads, github_stars)
+    def _track_release_date(self, package_id: str, release_date: Optional[str]):
+        """Record release_date if it is the package's newest parseable one."""
+        if not release_date or not isinstance(release_date, str):
+            return
 
-        # Apply recency multiplier
-        recency_multiplier = self._calculate_recency_multiplier(package_id)
-        score = base_score * recency_multiplier
+        m = _DATE_RE.match(release_date)
+        if m:
+            date_tuple = (int(m[1]), int(m[2]), int(m[3]))
+        else:
+            try:
+                dt = datetime.fromisoformat(release_date.replace('Z', '+00:00'))
+            except ValueError:
+                return  # Unparseable date
+            date_tuple = (dt.year, dt.month, dt.day)
+
+        latest_date = self._latest_release.get(package_id)
+        if latest_date is None or date_tuple > latest_date:
+            try:
+                date(*date_tuple)  # Reject out-of-range days like 2024-02-30
+            except ValueError:
+                return
+            self._latest_release[package_id] = date_tuple
+
+    def _process_comfy_nodes(self, package_id: str, version: str, comfy_nodes: List[Dict], score: float,
+                             new_package: bool = False):
+        """Process comfy-nodes metadata and create mappings.
 
+        Args:
+            package_id: Package the nodes belong to
+            version: Package version providing the nodes
+            comfy_nodes: comfy-nodes metadata entries for the version
+            score: Recency-weighted package score used to rank new entries
+            new_package: No entries exist for package_id yet, so the lookup is skipped
+                (a repeated node key within this version just rewrites an identical entry)
+        """
         for node_data in comfy_nodes:
-            display_name = node_data.get("comfy_node_name", "")
+            nget = node_data.get
+            display_name = nget("comfy_node_name", "")
             if not display_name:
                 continue
 
             # Parse and normalize inputs
-            input_types_str = node_data.get("input_types", "")
+            input_types_str = nget("input_types", "")
             normalized_inputs = ""
 
             if input_types_str:
-                try:
-                    # input_types might be string or already parsed dict
-                    if isinstance(input_types_str, str):
-                        normalized_inputs = normalize_registry_inputs(input_types_str)
-                    elif isinstance(input_types_str, dict):
-                        normalized_inputs = normalize_registry_inputs(json.dumps(input_types_str))
-                except Exception as e:
-                    logger.debug(f"Failed to normalize inputs for {display_name}: {e}")
-                    normalized_inputs = ""
+                # input_types might be string or already parsed dict
+                if isinstance(input_types_str, str):
+                    normalized_inputs = _normalize_inputs(input_types_str)
+                elif isinstance(input_types_str, dict):
+                    normalized_inputs = _normalize_inputs(json.dumps(input_types_str))
 
             # Create node key
-            node_key = create_node_key(display_name, normalized_inputs)
+            node_key = _node_key(display_name, normalized_inputs)
 
-            # Initialize mapping list if needed
-            if node_key not in self.mappings:
-                self.mappings[node_key] = []
+            # Initialize package map if needed
+            entries_by_package = self.mappings.get(node_key)
+            if entries_by_package is None:
+                entries_by_package = self.mappings[node_key] = {}
                 self.total_signatures += 1
 
             # Find existing entry for this package
-            existing_entry = None
-            for entry in self.mappings[node_key]:
-                if entry["package_id"] == package_id:
-                    existing_entry = entry
-                    break
+            existing_entry = None if new_package else entries_by_package.get(package_id)
 
             if existing_entry:
-                # Add version if not already present
-                if version not in existing_entry["versions"]:
-                    existing_entry["versions"].append(version)
+                # Add version (no-op if already present, order is kept)
+                existing_entry["versions"][version] = None
             else:
                 # Create new entry for this package (NO source field - Registry is default)
-                self.mappings[node_key].append({
+                entries_by_package[package_id] = {
                     "package_id": package_id,
-                    "versions": [version],
+                    "versions": {version: None},
                     "_temp_score": score,  # Temporary, will be removed after ranking
                     "rank": 0  # Will be set in _rank_all_mappings
-                })
+                }
 
             self.total_nodes += 1
 
     def _rank_all_mappings(self):
-        """Assign ranks to all package entries based on scores."""
-        for node_key, entries in self.mappings.items():
-            # Sort by score (descending)
-            entries.sort(key=lambda x: x["_temp_score"], reverse=True)
+        """Assign ranks to all package entries based on scores.
 
-            # Assign ranks and remove temporary score
+        Replaces each node key's package map with its ranked list of entries.
+        """
+        score_key = itemgetter("_temp_score")
+        for node_key, entries_by_package in self.mappings.items():
+            # Sort by score (descending); single-package signatures need no sort
+            entries = list(entries_by_package.values())
+            if len(entries) > 1:
+                entries.sort(key=score_key, reverse=True)
+            self.mappings[node_key] = entries
+
+            # Assign ranks, materialize version lists and remove temporary score
             for rank, entry in enumerate(entries, 1):
                 entry["rank"] = rank
+                entry["versions"] = list(entry["versions"])
                 del entry["_temp_score"]  # Remove score from output
 
+    def _materialize_packages(self):
+        """Convert package and version records into plain dicts for output."""
+        for package_id, package_info in self.packages.items():
+            if isinstance(package_info, PackageMeta):
+                self.packages[package_id] = package_info.to_dict()
+            else:
+                versions = package_info.get("versions", {})
+                for version, meta in versions.items():
+                    if isinstance(meta, VersionMeta):
+                        versions[version] = meta.to_dict()
+
 
 def main():
     parser = argparse.ArgumentParser(
@@ -363,6 +599,12 @@ Examples:
         default=Path("config/output_schema.toml"),
         help="Schema configuration file (default: config/output_schema.toml)"
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Worker processes for node processing on fresh builds (default: 1)"
+    )
     parser.add_argument(
         "--log-level",
         default="INFO",
@@ -374,24 +616,25 @@ Examples:
 
     # Build mappings
     builder = GlobalMappingsBuilder()
-    data = builder.build_mappings(registry_cache=args.cache, existing_mappings=args.existing)
+    data = builder.build_mappings(
+        registry_cache=args.cache,
+        existing_mappings=args.existing,
+        workers=args.workers
+    )
 
     if not data:
         logger.error("Failed to build mappings")
         return 1
 
-    # Apply schema filter if provided
-    if args.schema_config and args.schema_config.exists():
-        from schema_filter import SchemaFilter
-        filter = SchemaFilter(args.schema_config)
-        data = filter.filter_mappings_output(data)
-        logger.info(f"Applied schema filter from {args.schema_config}")
-
-    # Save results
+    # Save results, applying the schema filter (if provided) while streaming
     try:
         args.output.parent.mkdir(parents=True, exist_ok=True)
-        with open(args.output, 'w') as f:
-            json.dump(data, f, indent=2)
+        if args.schema_config and args.schema_config.exists():
+            from schema_filter import SchemaFilter
+            SchemaFilter(args.schema_config).dump_filtered(data, args.output)
+            logger.info(f"Applied schema filter from {args.schema_config}")
+        else:
+            json_utils.dump_streaming(data, args.output, stream_keys=("mappings", "packages"))
 
         file_size = args.output.stat().st_size / 1024 / 1024
         logger.info(f"✅ Mappings saved to {args.output} ({file_size:.1f} MB)")
@@ -3,18 +3,44 @@
 
 import argparse
 import asyncio
+import heapq
 import json
+import os
+import random
+import sqlite3
 import time
 from datetime import datetime
+from functools import partial
+from itertools import pairwise
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
 
-from registry_client import RegistryClient
+import aiohttp
 
-from logging import getLogger
+import json_utils
+from registry_client import AsyncTokenBucket, RegistryClient, parse_retry_after
+
+from logging import getLogger, DEBUG
 
 logger = getLogger(__name__)
 
+# Cache bookkeeping fields that a fresh node listing must not overwrite
+_PRESERVED_KEYS = frozenset({
+    'versions_list', 'basic_cached', 'versions_cached', 'metadata_count', 'first_seen', 'last_checked'
+})
+
+
+def _created_at(version: Dict) -> str:
+    """Sort key for versions: ISO creation date."""
+    return version.get("createdAt", "")
+
+
+def full_jitter_backoff(retries: int, cap: float = 60.0) -> float:
+    """Random retry delay in [0, min(cap, 2 ** retries)] seconds.
+
+    Jitter keeps concurrent runners from retrying the registry in lockstep.
+    """
+    return random.uniform(0, min(cap, 2 ** retries))
 
 
 class RegistryCacheBuilder:
@@ -30,7 +56,10 @@ class RegistryCacheBuilder:
         nodes_per_page: int = 100,
         rate_limit_delay: float = 0.1,
         max_retries: int = 3,
-        force_metadata_refresh: bool = False
+        force_metadata_refresh: bool = False,
+        connector_limit: Optional[int] = None,
+        use_metadata_store: bool = True,
+        session: Optional[aiohttp.ClientSession] = None
     ):
         self.concurrency = concurrency
         self.checkpoint_interval = checkpoint_interval
@@ -41,12 +70,29 @@ class RegistryCacheBuilder:
         self.rate_limit_delay = rate_limit_delay
         self.max_retries = max_retries
         self.force_metadata_refresh = force_metadata_refresh
+        self.connector_limit = connector_limit
+        self.use_metadata_store = use_metadata_store
+        self.session = session  # Shared HTTP session (a private one is opened if None)
         self.nodes_processed = 0
         self.versions_processed = 0
         self.metadata_fetched = 0
-        self.failed_nodes = []
+        self.failed_nodes: set[str] = set()  # Nodes that failed in any phase
         self.nodes_data = {}  # Using dict for O(1) lookups
         self.last_checkpoint = 0
+        self._dirty_node_ids: set[str] = set()  # Nodes changed since the last checkpoint
+        # node_id -> serialized node, written by checkpoints and reused by the
+        # final snapshot; dropped whenever the node changes
+        self._node_serialized: Dict[str, bytes] = {}
+        self._checkpoint_lock = asyncio.Lock()  # One delta append in flight, in order
+        self._checkpoint_tasks: set[asyncio.Task] = set()
+        # node_id -> top versions still missing metadata, kept up to date from
+        # Phase 2 on so Phase 3 doesn't have to rescan those nodes
+        self._missing_metadata: Dict[str, int] = {}
+        self._meta_store: Optional[sqlite3.Connection] = None  # Sidecar comfy-nodes store
+        # Running cache totals, kept in sync as nodes change so saves and the
+        # summary don't walk every version of every node
+        self._total_versions = 0
+        self._total_metadata = 0
 
     async def build_cache(
         self,
@@ -56,9 +102,14 @@ class RegistryCacheBuilder:
         fetch_versions: bool = True,
         fetch_metadata: bool = True,
         pages: Optional[int] = None
-    ):
-        """Build registry cache with progressive enhancement."""
-        start_time = time.time()
+    ) -> Dict[str, int]:
+        """Build registry cache with progressive enhancement.
+
+        Returns:
+            Summary stats written to the cache header (node_count,
+            versions_processed, metadata_entries)
+        """
+        start_time = time.monotonic()
 
         # Determine active phases
         phases = []
@@ -80,7 +131,29 @@ class RegistryCacheBuilder:
             self._load_cache(input_cache)
             logger.info(f"Loaded {len(self.nodes_data)} nodes from existing cache")
 
-        async with RegistryClient(concurrency=self.concurrency, max_retries=self.max_retries) as client:
+        # Resume: re-apply checkpoints left behind by an interrupted run
+        delta_file = self._delta_file(output_file)
+        if delta_file.exists():
+            applied = self._apply_deltas(delta_file)
+            logger.info(f"Resumed {applied} node updates from {delta_file}")
+
+        # Pace version/install/metadata requests with one shared token bucket,
+        # capped at the rate the per-task delays allowed across all workers
+        rate_limiter = None
+        if self.rate_limit_delay > 0:
+            max_rate = self.concurrency / self.rate_limit_delay
+            rate_limiter = AsyncTokenBucket(rate=max_rate, burst=self.concurrency, max_rate=max_rate)
+
+        async with RegistryClient(
+            concurrency=self.concurrency,
+            max_retries=self.max_retries,
+            rate_limiter=rate_limiter,
+            connector_limit=self.connector_limit,
+            session=self.session
+        ) as client:
+            logger.info(f"Connection pool: limit={client.connector_limit}, "
+                        f"per_host={client.connector_limit_per_host}")
+
             # Phase 1: Fetch basic node info
             if fetch_nodes:
                 await self._phase1_fetch_nodes(client, output_file, pages)
@@ -89,44 +162,90 @@ class RegistryCacheBuilder:
             if fetch_versions:
                 await self._phase2_fetch_versions(client, output_file)
                 # Explicit checkpoint after version updates
-                self._save_cache(output_file)
-                logger.info("📦 Checkpoint: Version updates saved")
+                self._checkpoint_in_background(output_file)
+                logger.info("📦 Checkpoint: Version updates queued")
 
             # Phase 3: Fetch metadata
             if fetch_metadata:
-                await self._phase3_fetch_metadata(client, output_file)
+                if self.use_metadata_store:
+                    self._open_metadata_store(output_file)
+                try:
+                    await self._phase3_fetch_metadata(client, output_file)
+                finally:
+                    self._close_metadata_store()
 
-            # Final save
-            self._save_cache(output_file)
+            # Final save (after in-flight checkpoints, which it supersedes).
+            # Nothing else touches the cache now, so the whole save, file
+            # syscalls included, runs off the event loop
+            await self._wait_for_checkpoints()
+            await asyncio.to_thread(self._save_cache, output_file)
 
         # Report results
-        elapsed = time.time() - start_time
+        elapsed = time.monotonic() - start_time
         self._print_summary(elapsed)
 
+        return self._cache_stats()
+
     async def _phase1_fetch_nodes(self, client: RegistryClient, output_file: Path, max_pages: Optional[int]):
-        """Phase 1: Fetch basic node information."""
+        """Phase 1: Fetch basic node information.
+
+        Page 1 reveals totalPages; the remaining pages are then fetched
+        concurrently and merged in page order.
+        """
         logger.info("=" * 60)
         logger.info("PHASE 1: Fetching basic node information")
         logger.info("=" * 60)
 
-        all_nodes = []
-        page = 1
-        total_pages = None
+        semaphore = asyncio.Semaphore(self.concurrency)
 
-        max_retries = 5  # More aggressive retries
-        while True:
-            if max_pages and page > max_pages:
-                logger.info(f"Reached max_pages limit ({max_pages})")
+        first_page = await self._fetch_nodes_page(client, 1, semaphore)
+        if first_page is None:
+            logger.error("Giving up on page 1, no nodes fetched")
+            return
+
+        total_pages = first_page.get("totalPages", 1)
+        logger.info(f"Total pages to fetch: {total_pages}")
+        last_page = min(total_pages, max_pages) if max_pages else total_pages
+        if max_pages and total_pages > max_pages:
+            logger.info(f"Reached max_pages limit ({max_pages})")
+
+        rest = await asyncio.gather(*[
+            self._fetch_nodes_page(client, page, semaphore)
+            for page in range(2, last_page + 1)
+        ]) if first_page.get("nodes") else []
+
+        total_fetched = 0
+        for page, data in enumerate([first_page, *rest], 1):
+            if data is None:
+                logger.error("Giving up on page %d, continuing with next page", page)
+                continue
+            nodes = data.get("nodes", [])
+            if not nodes:
+                # An empty page marks the end of the listing
                 break
+            self._merge_nodes(nodes)
+            total_fetched += len(nodes)
+            logger.info("Page %d: Cached %d nodes", page, len(nodes))
 
-            retries = 0
-            page_success = False
+        logger.info(f"Phase 1 complete: Fetched {total_fetched} nodes")
+
+    async def _fetch_nodes_page(self, client: RegistryClient, page: int,
+                                semaphore: asyncio.Semaphore) -> Optional[Dict]:
+        """Fetch one page of the node listing with retries.
+
+        Returns:
+            Response body, or None if the page could not be fetched
+        """
+        max_retries = 5  # More aggressive retries
+        url = f"{client.base_url}/nodes"
+        params = {"page": page, "limit": self.nodes_per_page}
 
-            while retries < max_retries and not page_success:
+        async with semaphore:
+            for retries in range(1, max_retries + 1):
                 try:
-                    logger.debug(f"Fetching nodes page {page} (limit={self.nodes_per_page})...")
-                    url = f"{client.base_url}/nodes"
-                    params = {"page": page, "limit": self.nodes_per_page}
+                    logger.debug("Fetching nodes page %d (limit=%d)...", page, self.nodes_per_page)
+                    if client.rate_limiter:
+                        await client.rate_limiter.acquire()
 
                     # Longer timeout for problematic pages
                     timeout = asyncio.wait_for(
@@ -135,104 +254,97 @@ class RegistryCacheBuilder:
                     )
 
                     async with await timeout as response:
+                        if response.status in (429, 503):
+                            # Rate limited or overloaded - honor Retry-After, else jittered backoff
+                            delay = parse_retry_after(response.headers.get("Retry-After"))
+                            if delay is None:
+                                delay = full_jitter_backoff(retries)
+                            if client.rate_limiter:
+                                client.rate_limiter.backoff(delay)
+                            logger.warning("Nodes page %d returned %d, backing off %.1fs (attempt %d/%d)",
+                                           page, response.status, delay, retries, max_retries)
+                            if retries < max_retries:
+                                await asyncio.sleep(delay)
+                            continue
+
                         if response.status != 200:
-                            logger.error(f"Failed to fetch nodes page {page}: {response.status}")
+                            logger.error("Failed to fetch nodes page %d: %d", page, response.status)
                             if response.status >= 400 and response.status < 500:
                                 # Client error - don't retry
-                                break
+                                return None
                             # Server error - will retry
-                            retries += 1
                             if retries < max_retries:
-                                await asyncio.sleep(3 ** retries)  # More aggressive backoff
+                                await asyncio.sleep(full_jitter_backoff(retries))
                             continue
 
-                        data = await response.json()
-                        nodes = data.get("nodes", [])
-
-                        if nodes:
-                            # Process and cache immediately
-                            for node in nodes:
-                                node_id = node["id"]
-                                api_latest = node.get("latest_version", {}).get("version") if isinstance(node.get("latest_version"), dict) else None
-
-                                if node_id not in self.nodes_data:
-                                    # New node - initialize with basic info and timestamps
-                                    self.nodes_data[node_id] = node
-                                    self.nodes_data[node_id]["basic_cached"] = True
-                                    self.nodes_data[node_id]["versions_cached"] = False
-                                    self.nodes_data[node_id]["metadata_count"] = 0
-                                    self.nodes_data[node_id]["first_seen"] = datetime.now().isoformat()
-                                    self.nodes_data[node_id]["last_checked"] = datetime.now().isoformat()
-                                    self.nodes_data[node_id]["_needs_version_refresh"] = True
-                                else:
-                                    # Update existing node with latest basic info
-                                    existing = self.nodes_data[node_id]
-                                    cached_latest = existing.get("latest_version", {}).get("version") if isinstance(existing.get("latest_version"), dict) else None
-
-                                    # Check if latest version changed
-                                    if api_latest != cached_latest:
-                                        existing["_needs_version_refresh"] = True
-                                        logger.debug(f"{node_id}: latest version changed ({cached_latest} → {api_latest})")
-                                    else:
-                                        # Check if not checked in 24h (fallback for intermediate versions)
-                                        last_checked = existing.get("last_checked")
-                                        if last_checked:
-                                            try:
-                                                last_checked_dt = datetime.fromisoformat(last_checked)
-                                                hours_since_check = (datetime.now() - last_checked_dt).total_seconds() / 3600
-                                                if hours_since_check > 24:
-                                                    existing["_needs_version_refresh"] = True
-                                                    logger.debug(f"{node_id}: forcing check (last checked {hours_since_check:.1f}h ago)")
-                                                else:
-                                                    existing["_needs_version_refresh"] = False
-                                            except Exception:
-                                                existing["_needs_version_refresh"] = True
-                                        else:
-                                            existing["_needs_version_refresh"] = True
-
-                                    existing.update({k: v for k, v in node.items()
-                                                   if k not in ['versions_list', 'basic_cached',
-                                                               'versions_cached', 'metadata_count', 'first_seen', 'last_checked']})
-                                    existing["basic_cached"] = True
-                                    # Note: last_checked is intentionally NOT updated here to allow Phase 2 to process existing nodes
-
-                            all_nodes.extend(nodes)
-                            logger.info(f"Page {page}: Cached {len(nodes)} nodes")
-
-                        if total_pages is None:
-                            total_pages = data.get("totalPages", 1)
-                            logger.info(f"Total pages to fetch: {total_pages}")
-
-                        page_success = True
-
-                        if page >= total_pages or not nodes:
-                            break
+                        if client.rate_limiter:
+                            client.rate_limiter.recover()
+                        return await response.json()
 
                 except asyncio.TimeoutError:
-                    retries += 1
-                    logger.warning(f"Timeout on page {page} (attempt {retries}/{max_retries})")
+                    logger.warning("Timeout on page %d (attempt %d/%d)", page, retries, max_retries)
                     if retries < max_retries:
-                        await asyncio.sleep(3 ** retries)  # More aggressive backoff
+                        await asyncio.sleep(full_jitter_backoff(retries))
                 except Exception as e:
-                    retries += 1
-                    logger.warning(f"Error fetching page {page} (attempt {retries}/{max_retries}): {e}")
+                    logger.warning("Error fetching page %d (attempt %d/%d): %s", page, retries, max_retries, e)
                     if retries < max_retries:
-                        await asyncio.sleep(3 ** retries)  # More aggressive backoff
+                        await asyncio.sleep(full_jitter_backoff(retries))
                     else:
-                        logger.error(f"Failed to fetch page {page} after {max_retries} attempts")
+                        logger.error("Failed to fetch page %d after %d attempts", page, max_retries)
 
-            if not page_success:
-                logger.error(f"Giving up on page {page}, continuing with next page")
-                # Continue to next page instead of breaking entirely
+        return None
 
-            if page_success and total_pages and page >= total_pages:
-                break
+    def _merge_nodes(self, nodes: List[Dict]):
+        """Merge one page of basic node info into the cache."""
+        # One timestamp for the whole page
+        now_dt = datetime.now()
+        now_iso = now_dt.isoformat()
+
+        for node in nodes:
+            node_id = node["id"]
+            api_latest = node.get("latest_version", {}).get("version") if isinstance(node.get("latest_version"), dict) else None
+            self._mark_dirty(node_id)
+
+            existing = self.nodes_data.get(node_id)
+            if existing is None:
+                # New node - initialize with basic info and timestamps
+                self._set_node(node_id, {
+                    **node,
+                    "basic_cached": True,
+                    "versions_cached": False,
+                    "metadata_count": 0,
+                    "first_seen": now_iso,
+                    "last_checked": now_iso,
+                    "_needs_version_refresh": True
+                })
+            else:
+                # Update existing node with latest basic info
+                cached_latest = existing.get("latest_version", {}).get("version") if isinstance(existing.get("latest_version"), dict) else None
 
-            page += 1
-            if page_success:
-                await asyncio.sleep(2)  # Longer delay between pages
+                # Check if latest version changed
+                if api_latest != cached_latest:
+                    existing["_needs_version_refresh"] = True
+                    logger.debug("%s: latest version changed (%s → %s)", node_id, cached_latest, api_latest)
+                else:
+                    # Check if not checked in 24h (fallback for intermediate versions)
+                    last_checked = existing.get("last_checked")
+                    if last_checked:
+                        try:
+                            last_checked_dt = datetime.fromisoformat(last_checked)
+                            hours_since_check = (now_dt - last_checked_dt).total_seconds() / 3600
+                            if hours_since_check > 24:
+                                existing["_needs_version_refresh"] = True
+                                logger.debug("%s: forcing check (last checked %.1fh ago)", node_id, hours_since_check)
+                            else:
+                                existing["_needs_version_refresh"] = False
+                        except Exception:
+                            existing["_needs_version_refresh"] = True
+                    else:
+                        existing["_needs_version_refresh"] = True
 
-        logger.info(f"Phase 1 complete: Fetched {len(all_nodes)} nodes")
+                existing.update((k, v) for k, v in node.items() if k not in _PRESERVED_KEYS)
+                existing["basic_cached"] = True
+                # Note: last_checked is intentionally NOT updated here to allow Phase 2 to process existing nodes
 
     async def _phase2_fetch_versions(self, client: RegistryClient, output_file: Path):
         """Phase 2: Fetch versions and install info."""
@@ -262,34 +374,11 @@ class RegistryCacheBuilder:
 
         logger.info(f"Checking versions for {len(nodes_to_process)} nodes")
 
-        # Process in batches for checkpointing
-        for i in range(0, len(nodes_to_process), self.checkpoint_interval):
-            batch = nodes_to_process[i:i+self.checkpoint_interval]
-            batch_num = (i // self.checkpoint_interval) + 1
-            total_batches = (len(nodes_to_process) + self.checkpoint_interval - 1) // self.checkpoint_interval
-
-            logger.info(f"Processing batch {batch_num}/{total_batches} ({len(batch)} nodes)")
-
-            # Process batch in groups of `concurrency` to respect rate limits
-            for j in range(0, len(batch), self.concurrency):
-                group = batch[j:j+self.concurrency]
-
-                tasks = [
-                    asyncio.create_task(self._fetch_node_versions_incremental(client, node_id))
-                    for node_id, _ in group
-                ]
-
-                try:
-                    await asyncio.wait_for(
-                        asyncio.gather(*tasks, return_exceptions=True),
-                        timeout=self.batch_timeout
-                    )
-                except asyncio.TimeoutError:
-                    logger.error(f"Batch {batch_num} group {j//self.concurrency + 1} timed out")
-
-            # Checkpoint after each batch
-            self._save_cache(output_file)
-            logger.info(f"Checkpoint saved after batch {batch_num}")
+        await self._run_nodes(
+            partial(self._fetch_node_versions_incremental, client),
+            [node_id for node_id, _ in nodes_to_process],
+            partial(self._checkpoint_in_background, output_file)
+        )
 
     async def _phase3_fetch_metadata(self, client: RegistryClient, output_file: Path):
         """Phase 3: Fetch metadata for versions."""
@@ -304,25 +393,16 @@ class RegistryCacheBuilder:
             logger.info("⚠️  METADATA OVERRIDE MODE: Will re-fetch all metadata even if cached")
 
         # Get nodes that need metadata for their LATEST versions
-        nodes_needing_metadata = []
-        for node_id, node in self.nodes_data.items():
-            versions_list = node.get("versions_list", [])
-            if not versions_list:
-                continue
-
-            # Get the top N versions (already sorted newest first)
-            max_to_check = self.max_versions if self.max_versions > 0 else len(versions_list)
-            top_versions = versions_list[:max_to_check]
-
-            # Check if we need to process this node
-            if self.force_metadata_refresh:
-                # Force refresh mode - process ALL nodes with versions
-                nodes_needing_metadata.append((node_id, node, len(top_versions)))
-            else:
-                # Normal mode - only process nodes with missing metadata
-                missing_metadata_count = sum(1 for v in top_versions if not v.get("metadata_cached", False))
-                if missing_metadata_count > 0:
-                    nodes_needing_metadata.append((node_id, node, missing_metadata_count))
+        if self.force_metadata_refresh:
+            # Force refresh mode - process ALL nodes with versions
+            nodes_needing_metadata = [
+                node_id for node_id, node in self.nodes_data.items() if node.get("versions_list")
+            ]
+        else:
+            # Normal mode - only process nodes with missing metadata
+            nodes_needing_metadata = [
+                node_id for node_id in self.nodes_data if self._needs_metadata(node_id)
+            ]
 
         if not nodes_needing_metadata:
             logger.info("All nodes have sufficient metadata cached")
@@ -330,87 +410,132 @@ class RegistryCacheBuilder:
 
         logger.info(f"Processing metadata for {len(nodes_needing_metadata)} nodes")
 
-        # Process in batches
-        for i in range(0, len(nodes_needing_metadata), self.checkpoint_interval):
-            batch = nodes_needing_metadata[i:i+self.checkpoint_interval]
-            batch_num = (i // self.checkpoint_interval) + 1
-            total_batches = (len(nodes_needing_metadata) + self.checkpoint_interval - 1) // self.checkpoint_interval
+        def checkpoint():
+            if self._meta_store:
+                self._meta_store.commit()  # One transaction per batch
+            self._checkpoint_in_background(output_file)
 
-            logger.info(f"Processing batch {batch_num}/{total_batches} ({len(batch)} nodes)")
+        await self._run_nodes(
+            partial(self._fetch_node_metadata, client),
+            nodes_needing_metadata,
+            checkpoint
+        )
 
-            # Process batch in groups of `concurrency` to respect rate limits
-            for j in range(0, len(batch), self.concurrency):
-                group = batch[j:j+self.concurrency]
+    async def _run_nodes(
+        self,
+        fetch: Callable[[str], Awaitable[None]],
+        node_ids: List[str],
+        checkpoint: Callable[[], None]
+    ):
+        """Run fetch(node_id) for every node with at most `concurrency` in flight.
 
-                tasks = [
-                    asyncio.create_task(self._fetch_node_metadata(client, node_id))
-                    for node_id, node, _ in group
-                ]
+        All nodes are scheduled up front under one semaphore, so the request
+        pipeline never drains at a batch boundary. checkpoint() runs after
+        every checkpoint_interval completed nodes and once at the end. Each
+        node is bounded by node_timeout; a batch that hasn't filled within
+        batch_timeout is checkpointed early and logged.
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
 
+        async def bounded(node_id: str):
+            async with semaphore:
                 try:
-                    await asyncio.wait_for(
-                        asyncio.gather(*tasks, return_exceptions=True),
-                        timeout=self.batch_timeout
-                    )
+                    await asyncio.wait_for(fetch(node_id), timeout=self.node_timeout)
                 except asyncio.TimeoutError:
-                    logger.error(f"Batch {batch_num} group {j//self.concurrency + 1} timed out")
+                    logger.error("%s timed out after %ss", node_id, self.node_timeout)
+                    self.failed_nodes.add(node_id)
+
+        loop = asyncio.get_running_loop()
+        total = len(node_ids)
+        pending = {asyncio.create_task(bounded(node_id), name=node_id) for node_id in node_ids}
+        completed = 0
+        batch_done = 0
+        batch_num = 0
+        deadline = loop.time() + self.batch_timeout
+
+        try:
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending,
+                    timeout=max(0.0, deadline - loop.time()),
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is not None:
+                        logger.error("Error processing %s: %s", task.get_name(), task.exception())
+                completed += len(done)
+                batch_done += len(done)
+
+                if batch_done < self.checkpoint_interval and pending and done:
+                    continue
 
-            # Checkpoint after each batch
-            self._save_cache(output_file)
-            logger.info(f"Checkpoint saved after batch {batch_num}")
+                batch_num += 1
+                if not done:
+                    logger.error(f"Batch {batch_num} timed out")
+                checkpoint()
+                logger.info(f"Checkpoint queued after batch {batch_num} ({completed}/{total} nodes)")
+                batch_done = 0
+                deadline = loop.time() + self.batch_timeout
+        finally:
+            for task in pending:
+                task.cancel()
 
     async def _fetch_node_versions_incremental(self, client: RegistryClient, node_id: str):
         """Fetch versions and install info incrementally for a node."""
         try:
-            # Get current versions from API with rate limiting delay
+            # Get current versions from API (paced by the client's rate limiter)
             api_versions = await client.get_node_versions(node_id)
-            await asyncio.sleep(self.rate_limit_delay)  # Rate limit delay between version requests
 
             if not api_versions:
                 # No versions available
                 if "versions_list" not in self.nodes_data[node_id]:
                     self.nodes_data[node_id]["versions_list"] = []
                     self.nodes_data[node_id]["versions_cached"] = True
-                    logger.debug(f"No versions found for {node_id}")
+                    self._missing_metadata[node_id] = 0
+                    self._mark_dirty(node_id)
+                    logger.debug("No versions found for %s", node_id)
                 return
 
-            # Sort API versions by date (most recent first)
-            api_versions.sort(key=lambda v: v.get("createdAt", ""), reverse=True)
-
             # Get existing cached versions
             existing_versions = self.nodes_data[node_id].get("versions_list", [])
             existing_version_map = {v["version"]: v for v in existing_versions}
 
-            # Update deprecated status for existing versions
+            # Update deprecated status for existing versions and collect NEW
+            # versions that aren't cached yet, in one pass
             deprecated_updates = 0
+            new_versions = []
             for api_version in api_versions:
-                version_key = api_version["version"]
-                if version_key in existing_version_map:
-                    cached_version = existing_version_map[version_key]
-                    api_deprecated = api_version.get("deprecated", False)
-                    cached_deprecated = cached_version.get("deprecated", False)
+                cached_version = existing_version_map.get(api_version["version"])
+                if cached_version is None:
+                    new_versions.append(api_version)
+                    continue
 
-                    if api_deprecated != cached_deprecated:
-                        cached_version["deprecated"] = api_deprecated
-                        deprecated_updates += 1
+                api_deprecated = api_version.get("deprecated", False)
+                cached_deprecated = cached_version.get("deprecated", False)
+                if api_deprecated != cached_deprecated:
+                    cached_version["deprecated"] = api_deprecated
+                    deprecated_updates += 1
 
-            # Find NEW versions that aren't cached yet
-            new_versions = [v for v in api_versions if v["version"] not in existing_version_map]
+            # Only new versions need date order (most recent first), so the
+            # usually much longer full API list is never sorted
+            new_versions.sort(key=_created_at, reverse=True)
 
             if not new_versions and deprecated_updates == 0:
-                logger.debug(f"No updates for {node_id} ({len(existing_versions)} cached)")
+                logger.debug("No updates for %s (%d cached)", node_id, len(existing_versions))
                 return
 
             if deprecated_updates > 0:
-                logger.debug(f"Updated deprecated status for {deprecated_updates} versions of {node_id}")
+                self._mark_dirty(node_id)
+                logger.debug("Updated deprecated status for %d versions of %s", deprecated_updates, node_id)
 
             if not new_versions:
-                logger.debug(f"No new versions for {node_id}, but updated {deprecated_updates} deprecated flags")
+                logger.debug("No new versions for %s, but updated %d deprecated flags", node_id, deprecated_updates)
                 return
 
-            logger.debug(f"Found {len(new_versions)} new versions for {node_id} (had {len(existing_versions)})")
+            logger.debug("Found %d new versions for %s (had %d)", len(new_versions), node_id, len(existing_versions))
 
             # Process NEW versions - only call install if downloadUrl missing
+            now_iso = datetime.now().isoformat()
             new_enriched_versions = []
             install_calls_made = 0
 
@@ -432,31 +557,41 @@ class RegistryCacheBuilder:
                         version_info["dependencies"] = install_info.get("dependencies", [])
                         version_info["install_type"] = install_info.get("installType", "")
                     install_calls_made += 1
-                    await asyncio.sleep(0.02)  # Rate limit only when making API calls
 
                 version_info["metadata_cached"] = False
-                version_info["first_seen"] = datetime.now().isoformat()
+                version_info["first_seen"] = now_iso
                 new_enriched_versions.append(version_info)
                 self.versions_processed += 1
 
             if install_calls_made > 0:
-                logger.debug(f"Made {install_calls_made} install calls for {node_id} (others had downloadUrl)")
+                logger.debug("Made %d install calls for %s (others had downloadUrl)", install_calls_made, node_id)
             else:
-                logger.debug(f"No install calls needed for {node_id} - all versions had downloadUrl")
-
-            # Merge: existing versions + new versions, maintain sort by date
-            all_versions = list(existing_versions) + new_enriched_versions
-            all_versions.sort(key=lambda v: v.get("createdAt", ""), reverse=True)
+                logger.debug("No install calls needed for %s - all versions had downloadUrl", node_id)
+
+            # Merge: existing versions + new versions, maintain sort by date.
+            # Both are normally newest-first already (new versions come from the
+            # sorted API list), so a linear merge suffices; heapq.merge is stable,
+            # matching the sort it replaces on equal dates
+            if all(_created_at(a) >= _created_at(b) for a, b in pairwise(existing_versions)):
+                all_versions = list(heapq.merge(existing_versions, new_enriched_versions,
+                                                key=_created_at, reverse=True))
+            else:
+                all_versions = list(existing_versions) + new_enriched_versions
+                all_versions.sort(key=_created_at, reverse=True)
 
+            self._total_versions += len(new_enriched_versions)
+            self._total_metadata += sum(len(v.get("comfy_nodes", [])) for v in new_enriched_versions)
             self.nodes_data[node_id]["versions_list"] = all_versions
+            self._missing_metadata[node_id] = self._count_missing_metadata(all_versions)
             self.nodes_data[node_id]["versions_cached"] = True
-            self.nodes_data[node_id]["last_checked"] = datetime.now().isoformat()
+            self.nodes_data[node_id]["last_checked"] = now_iso
+            self._mark_dirty(node_id)
 
-            logger.debug(f"Added {len(new_enriched_versions)} new versions to {node_id} (total: {len(all_versions)})")
+            logger.debug("Added %d new versions to %s (total: %d)", len(new_enriched_versions), node_id, len(all_versions))
 
         except Exception as e:
-            logger.error(f"Failed to fetch versions for {node_id}: {e}")
-            self.failed_nodes.append(node_id)
+            logger.error("Failed to fetch versions for %s: %s", node_id, e)
+            self.failed_nodes.add(node_id)
 
     async def _fetch_node_metadata(self, client: RegistryClient, node_id: str):
         """Fetch metadata for the latest N versions of a node."""
@@ -466,113 +601,345 @@ class RegistryCacheBuilder:
 
             if not versions_list:
                 return
+            if not self.force_metadata_refresh and self._missing_metadata.get(node_id) == 0:
+                return  # Everything in the top N is already cached
 
             # Only process the top N versions (already sorted newest first)
             max_to_process = self.max_versions if self.max_versions > 0 else len(versions_list)
             top_versions = versions_list[:max_to_process]
 
             metadata_fetched = 0
+            newly_cached = 0
 
-            for version_info in top_versions:
-                # Skip if already has metadata (unless forcing refresh)
-                if not self.force_metadata_refresh:
-                    if version_info.get("metadata_cached", False):
+            try:
+                for version_info in top_versions:
+                    # Skip if already has metadata (unless forcing refresh)
+                    was_cached = version_info.get("metadata_cached", False)
+                    if was_cached and not self.force_metadata_refresh:
                         continue
 
-                version = version_info["version"]
+                    version = version_info["version"]
+
+                    # Get comfy-nodes metadata, from the sidecar store if a previous
+                    # run already fetched it
+                    comfy_nodes = None if self.force_metadata_refresh else self._stored_comfy_nodes(node_id, version)
+                    if comfy_nodes is None:
+                        logger.debug("Fetching metadata for %s@%s", node_id, version)
+                        comfy_nodes = await client.get_comfy_nodes(node_id, version)
+                        if comfy_nodes is not None:
+                            self._store_comfy_nodes(node_id, version, comfy_nodes)
+
+                    if comfy_nodes is None:
+                        # Failed to fetch (rate limited, timeout, error)
+                        # Don't mark as cached so we can retry on next run
+                        logger.debug("Failed to fetch metadata for %s@%s, will retry on next run", node_id, version)
+                        continue
+                    elif comfy_nodes:
+                        # Successfully fetched with data
+                        self._total_metadata += len(comfy_nodes) - len(version_info.get("comfy_nodes", []))
+                        version_info["comfy_nodes"] = comfy_nodes
+                        version_info["metadata_cached"] = True
+                        self.metadata_fetched += len(comfy_nodes)
+                        metadata_fetched += 1
+                    else:
+                        # Successfully fetched but empty (no metadata exists for this version)
+                        self._total_metadata -= len(version_info.get("comfy_nodes", []))
+                        version_info["comfy_nodes"] = []
+                        version_info["metadata_cached"] = True
+                        metadata_fetched += 1
+                    if not was_cached:
+                        newly_cached += 1
+            finally:
+                # Update metadata counts by what changed instead of rescanning.
+                # This also runs when a later version raises or the per-node
+                # timeout cancels the fetch, so versions already updated still
+                # mark the node dirty and the next save re-serializes it
+                if node_id in self._missing_metadata:
+                    self._missing_metadata[node_id] -= newly_cached
+                metadata_count = node.get("metadata_count")
+                if metadata_count is None:
+                    metadata_count = sum(
+                        1 for v in versions_list if v.get("metadata_cached", False)
+                    )
+                else:
+                    metadata_count += newly_cached
+                if metadata_fetched or node.get("metadata_count") != metadata_count:
+                    self._mark_dirty(node_id)
+                node["metadata_count"] = metadata_count
 
-                # Get comfy-nodes metadata
-                logger.debug(f"Fetching metadata for {node_id}@{version}")
-                comfy_nodes = await client.get_comfy_nodes(node_id, version)
+            logger.debug("Fetched metadata for %d versions of %s", metadata_fetched, node_id)
 
-                if comfy_nodes is None:
-                    # Failed to fetch (rate limited, timeout, error)
-                    # Don't mark as cached so we can retry on next run
-                    logger.debug(f"Failed to fetch metadata for {node_id}@{version}, will retry on next run")
-                    continue
-                elif comfy_nodes:
-                    # Successfully fetched with data
-                    version_info["comfy_nodes"] = comfy_nodes
-                    version_info["metadata_cached"] = True
-                    self.metadata_fetched += len(comfy_nodes)
-                    metadata_fetched += 1
-                else:
-                    # Successfully fetched but empty (no metadata exists for this version)
-                    version_info["comfy_nodes"] = []
-                    version_info["metadata_cached"] = True
-                    metadata_fetched += 1
+        except Exception as e:
+            logger.error("Failed to fetch metadata for %s: %s", node_id, e)
+            self.failed_nodes.add(node_id)
 
-                await asyncio.sleep(0.05)  # Rate limit
+    @staticmethod
+    def _metadata_store_file(output_file: Path) -> Path:
+        """Sidecar comfy-nodes store for output_file."""
+        return output_file.with_suffix('.metacache.db')
 
-            # Update metadata count
-            node["metadata_count"] = sum(
-                1 for v in versions_list if v.get("metadata_cached", False)
+    def _open_metadata_store(self, output_file: Path):
+        """Open (creating if needed) the persistent comfy-nodes store.
+
+        Fetched comfy-nodes are kept per (node_id, version) next to the cache,
+        so a pruned cache or a new output path doesn't refetch metadata that
+        was already downloaded.
+        """
+        store_file = self._metadata_store_file(output_file)
+        store_file.parent.mkdir(parents=True, exist_ok=True)
+        self._meta_store = sqlite3.connect(store_file)
+        self._meta_store.execute(
+            "CREATE TABLE IF NOT EXISTS meta("
+            "node_id TEXT, version TEXT, comfy_nodes BLOB, PRIMARY KEY(node_id, version))"
+        )
+
+    def _close_metadata_store(self):
+        """Commit and close the comfy-nodes store, if open."""
+        if self._meta_store:
+            self._meta_store.commit()
+            self._meta_store.close()
+            self._meta_store = None
+
+    def _stored_comfy_nodes(self, node_id: str, version: str) -> Optional[List[Dict]]:
+        """Comfy-nodes previously fetched for node_id@version, or None if unknown."""
+        if not self._meta_store:
+            return None
+        row = self._meta_store.execute(
+            "SELECT comfy_nodes FROM meta WHERE node_id = ? AND version = ?", (node_id, version)
+        ).fetchone()
+        return json_utils.loads(row[0]) if row else None
+
+    def _store_comfy_nodes(self, node_id: str, version: str, comfy_nodes: List[Dict]):
+        """Remember fetched comfy-nodes (committed once per Phase 3 batch)."""
+        if self._meta_store:
+            self._meta_store.execute(
+                "INSERT OR REPLACE INTO meta VALUES (?, ?, ?)",
+                (node_id, version, json_utils.dumps(comfy_nodes))
             )
 
-            logger.debug(f"Fetched metadata for {metadata_fetched} versions of {node_id}")
+    def _needs_metadata(self, node_id: str) -> bool:
+        """Whether any of a node's top max_versions versions lacks metadata."""
+        missing = self._missing_metadata.get(node_id)
+        if missing is None:
+            missing = self._count_missing_metadata(self.nodes_data[node_id].get("versions_list", []))
+        return missing > 0
 
-        except Exception as e:
-            logger.error(f"Failed to fetch metadata for {node_id}: {e}")
-            self.failed_nodes.append(node_id)
+    def _count_missing_metadata(self, versions_list: List[Dict]) -> int:
+        """Count the top max_versions versions that have no metadata cached yet."""
+        max_to_check = self.max_versions if self.max_versions > 0 else len(versions_list)
+        return sum(1 for v in versions_list[:max_to_check] if not v.get("metadata_cached", False))
 
     def _load_cache(self, cache_file: Path):
         """Load existing cache data with timestamp preservation."""
-        with open(cache_file, 'r') as f:
-            cache_data = json.load(f)
+        cache_data = json_utils.load(cache_file)
+
+        # Fallback timestamp for entries cached before timestamps existed
+        default_seen = cache_data["cached_at"] if "cached_at" in cache_data else datetime.now().isoformat()
 
-        # Convert nodes list to dict for efficient lookups
+        # Nodes are stored as a list (other scripts stream it as an array);
+        # a dict keyed by node id is accepted as well
         nodes = cache_data.get("nodes", [])
+        if isinstance(nodes, dict):
+            nodes = nodes.values()
+
+        # Index nodes by id for O(1) lookups, backfilling missing timestamps
         for node in nodes:
             # Ensure timestamps exist for existing data
             if "first_seen" not in node:
-                node["first_seen"] = cache_data.get("cached_at", datetime.now().isoformat())
+                node["first_seen"] = default_seen
             if "last_checked" not in node:
-                node["last_checked"] = cache_data.get("cached_at", datetime.now().isoformat())
+                node["last_checked"] = default_seen
 
             # Ensure version timestamps exist
             for version in node.get("versions_list", []):
                 if "first_seen" not in version:
-                    version["first_seen"] = node.get("first_seen", datetime.now().isoformat())
+                    version["first_seen"] = node["first_seen"]
+
+            self._set_node(node["id"], node)
+
+    @staticmethod
+    def _node_totals(node: Dict) -> Tuple[int, int]:
+        """(versions, comfy-node entries) held by one node."""
+        versions_list = node.get("versions_list", [])
+        return len(versions_list), sum(len(v.get("comfy_nodes", [])) for v in versions_list)
+
+    def _set_node(self, node_id: str, node: Dict):
+        """Store a whole node, keeping the running totals in sync."""
+        old = self.nodes_data.get(node_id)
+        if old is not None:
+            versions, metadata = self._node_totals(old)
+            self._total_versions -= versions
+            self._total_metadata -= metadata
+        versions, metadata = self._node_totals(node)
+        self._total_versions += versions
+        self._total_metadata += metadata
+        self.nodes_data[node_id] = node
+
+    def _check_totals(self):
+        """Recompute cache totals and resync the running counters if they drifted (debug only).
+
+        Drift is logged rather than raised, so it never aborts the final save.
+        """
+        total_versions = total_metadata = 0
+        for node in self.nodes_data.values():
+            versions, metadata = self._node_totals(node)
+            total_versions += versions
+            total_metadata += metadata
+        if (total_versions, total_metadata) != (self._total_versions, self._total_metadata):
+            logger.warning(
+                "Running totals out of sync (versions %d != %d, metadata %d != %d), using recomputed values",
+                self._total_versions, total_versions, self._total_metadata, total_metadata
+            )
+            self._total_versions = total_versions
+            self._total_metadata = total_metadata
+
+    def _mark_dirty(self, node_id: str):
+        """Record that a node changed so the next checkpoint writes it."""
+        self._dirty_node_ids.add(node_id)
+        self._node_serialized.pop(node_id, None)
+
+    def _serialize_node(self, node_id: str) -> bytes:
+        """Serialized node, reusing the bytes from its last checkpoint if unchanged."""
+        data = self._node_serialized.get(node_id)
+        if data is None:
+            data = json_utils.dumps(self.nodes_data[node_id])
+        return data
+
+    @staticmethod
+    def _delta_file(output_file: Path) -> Path:
+        """Sidecar checkpoint log for output_file."""
+        return Path(str(output_file) + '.delta.jsonl')
+
+    def _apply_deltas(self, delta_file: Path) -> int:
+        """Replay checkpoint deltas on top of the loaded cache.
+
+        Later lines win. A truncated trailing line from a crash mid-write is
+        skipped.
+
+        Returns:
+            Number of delta lines applied
+        """
+        applied = 0
+        with open(delta_file, 'rb') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    delta = json_utils.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning("Skipping corrupt checkpoint line in %s", delta_file)
+                    continue
+
+                self._set_node(delta["id"], delta["node"])
+                applied += 1
 
-            self.nodes_data[node["id"]] = node
+        return applied
+
+    def _checkpoint_delta(self, output_file: Path):
+        """Append nodes changed since the last checkpoint to the delta log.
+
+        Checkpoints only record what changed, as one compact JSON line per
+        node in <output>.delta.jsonl; the full cache is written once by
+        _save_cache at the end of the run.
+        """
+        data, count = self._collect_delta()
+        if count:
+            self._append_delta(output_file, data, count)
+
+    def _checkpoint_in_background(self, output_file: Path):
+        """Checkpoint like _checkpoint_delta, but write the file off the event loop.
+
+        Changed nodes are serialized right away, since fetch tasks keep
+        mutating them; only the append and fsync run in a worker thread.
+        """
+        data, count = self._collect_delta()
+        if not count:
+            return
+
+        async def write():
+            async with self._checkpoint_lock:
+                await asyncio.to_thread(self._append_delta, output_file, data, count)
+
+        task = asyncio.create_task(write())
+        self._checkpoint_tasks.add(task)
+        task.add_done_callback(self._checkpoint_tasks.discard)
+
+    async def _wait_for_checkpoints(self):
+        """Wait for background checkpoints, re-raising any write error."""
+        if self._checkpoint_tasks:
+            await asyncio.gather(*self._checkpoint_tasks)
+
+    def _collect_delta(self) -> tuple[bytes, int]:
+        """Serialize the dirty nodes as delta lines and reset the dirty set.
+
+        Returns:
+            (delta lines, number of nodes)
+        """
+        lines = []
+        for node_id in self._dirty_node_ids:
+            node_bytes = self._node_serialized[node_id] = json_utils.dumps(self.nodes_data[node_id])
+            lines.append(b'{"id":' + json_utils.dumps(node_id) + b',"node":' + node_bytes + b'}\n')
+        count = len(self._dirty_node_ids)
+        self._dirty_node_ids.clear()
+        return b''.join(lines), count
+
+    def _append_delta(self, output_file: Path, data: bytes, count: int):
+        """Append serialized delta lines to the delta log and fsync."""
+        delta_file = self._delta_file(output_file)
+        delta_file.parent.mkdir(parents=True, exist_ok=True)
+
+        with open(delta_file, 'ab') as f:
+            f.write(data)
+            # Make the checkpoint durable before we consider it saved
+            f.flush()
+            os.fsync(f.fileno())
+
+        logger.debug("Checkpoint: %d nodes appended to %s", count, delta_file)
+
+    def _cache_stats(self) -> Dict[str, int]:
+        """Cache summary stats, from the running totals."""
+        return {
+            "node_count": len(self.nodes_data),
+            "versions_processed": self._total_versions,
+            "metadata_entries": self._total_metadata
+        }
 
     def _save_cache(self, output_file: Path):
         """Save cache to file atomically."""
         try:
-            # Convert nodes dict to list for storage
-            nodes_list = list(self.nodes_data.values())
-
-            # Calculate stats
-            total_versions = sum(
-                len(n.get("versions_list", [])) for n in nodes_list
-            )
-            total_metadata = sum(
-                sum(len(v.get("comfy_nodes", [])) for v in n.get("versions_list", []))
-                for n in nodes_list
-            )
-
-            cache_data = {
+            # Stats come from the running totals
+            if logger.isEnabledFor(DEBUG):
+                self._check_totals()
+            header = json_utils.dumps({
                 "cached_at": datetime.now().isoformat(),
-                "node_count": len(nodes_list),
-                "versions_processed": total_versions,
-                "metadata_entries": total_metadata,
-                "nodes": nodes_list
-            }
+                **self._cache_stats()
+            })
 
             output_file.parent.mkdir(parents=True, exist_ok=True)
 
-            # Atomic write
+            # Atomic write (compact: the cache is only read by other scripts).
+            # Nodes are spliced in as pre-serialized fragments after the header
             temp_file = Path(str(output_file) + '.tmp')
             try:
-                with open(temp_file, 'w') as f:
-                    json.dump(cache_data, f, indent=2)
+                with open(temp_file, 'wb') as f:
+                    f.write(header[:-1] + b',"nodes":[')
+                    f.write(b','.join(self._serialize_node(node_id) for node_id in self.nodes_data))
+                    f.write(b']}')
+                    # Durable before the delta log (the resume fallback) is dropped
+                    f.flush()
+                    os.fsync(f.fileno())
                 temp_file.replace(output_file)
+            except Exception:
+                temp_file.unlink(missing_ok=True)
+                raise
 
-                file_size = output_file.stat().st_size / 1024 / 1024
-                logger.debug(f"Cache saved: {len(nodes_list)} nodes, {file_size:.1f} MB")
-            finally:
-                if temp_file.exists():
-                    temp_file.unlink()
+            file_size = output_file.stat().st_size / 1024 / 1024
+            logger.debug("Cache saved: %d nodes, %.1f MB", len(self.nodes_data), file_size)
+
+            # Full snapshot supersedes any checkpoint deltas
+            self._dirty_node_ids.clear()
+            self._node_serialized.clear()
+            self._delta_file(output_file).unlink(missing_ok=True)
 
         except Exception as e:
             logger.error(f"Failed to save cache: {e}")
@@ -580,18 +947,19 @@ class RegistryCacheBuilder:
 
     def _print_summary(self, elapsed: float):
         """Print build summary."""
-        nodes_list = list(self.nodes_data.values())
-
-        # Calculate phase completion stats
-        phase1_complete = sum(1 for n in nodes_list if n.get("basic_cached", False))
-        phase2_complete = sum(1 for n in nodes_list if n.get("versions_cached", False))
-        phase3_nodes = sum(1 for n in nodes_list if n.get("metadata_count", 0) > 0)
-
-        total_versions = sum(len(n.get("versions_list", [])) for n in nodes_list)
-        total_metadata = sum(
-            sum(len(v.get("comfy_nodes", [])) for v in n.get("versions_list", []))
-            for n in nodes_list
-        )
+        # Calculate phase completion stats in a single pass; version and
+        # metadata totals are tracked as the cache changes
+        phase1_complete = phase2_complete = phase3_nodes = 0
+        for n in self.nodes_data.values():
+            get = n.get
+            if get("basic_cached", False):
+                phase1_complete += 1
+            if get("versions_cached", False):
+                phase2_complete += 1
+            if get("metadata_count", 0) > 0:
+                phase3_nodes += 1
+        total_versions = self._total_versions
+        total_metadata = self._total_metadata
 
         logger.info("=" * 60)
         logger.info("📊 CACHE BUILD SUMMARY")
@@ -604,7 +972,7 @@ class RegistryCacheBuilder:
         logger.info("=" * 60)
 
         if self.failed_nodes:
-            logger.warning(f"Failed nodes: {', '.join(self.failed_nodes[:10])}"
+            logger.warning(f"Failed nodes: {', '.join(sorted(self.failed_nodes)[:10])}"
                          + (f" ... and {len(self.failed_nodes) - 10} more"
                             if len(self.failed_nodes) > 10 else ""))
 
@@ -675,6 +1043,11 @@ Progressive Enhancement Examples:
         default=20,
         help="Save checkpoint every N nodes"
     )
+    parser.add_argument(
+        "--connector-limit",
+        type=int,
+        help="Max pooled HTTP connections (default: sized from --concurrency)"
+    )
     parser.add_argument(
         "--nodes-per-page",
         type=int,
@@ -689,6 +1062,11 @@ Progressive Enhancement Examples:
         default=-1,
         help="Max versions per node to fetch metadata for (-1 for all)"
     )
+    parser.add_argument(
+        "--no-metadata-store",
+        action="store_true",
+        help="Don't read or write the <output>.metacache.db comfy-nodes store"
+    )
     parser.add_argument(
         "--pages",
         type=int,
@@ -726,7 +1104,9 @@ Progressive Enhancement Examples:
         node_timeout=args.node_timeout,
         batch_timeout=args.batch_timeout,
         max_versions=args.max_versions,
-        nodes_per_page=args.nodes_per_page
+        nodes_per_page=args.nodes_per_page,
+        connector_limit=args.connector_limit,
+        use_metadata_store=not args.no_metadata_store
     )
 
     asyncio.run(
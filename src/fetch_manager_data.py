@@ -7,22 +7,91 @@ Standalone utility to download and cache Manager's extension data.
 import argparse
 import asyncio
 import aiohttp
-import json
+import os
+import time
 from datetime import datetime
 from pathlib import Path
+from typing import Any, Dict, Optional, Set, Tuple
+
+import json_utils
 
 import logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 
+def _summarize_wrapped(data: Any) -> Tuple[Set[str], bool, int]:
+    """Summarize loaded Manager data for validation.
+
+    Returns:
+        (top-level fields, whether extensions is a dict, valid extension count)
+    """
+    if not isinstance(data, dict):
+        return set(), False, 0
+
+    extensions = data.get("extensions")
+    if not isinstance(extensions, dict):
+        return set(data), False, 0
+
+    valid_extensions = 0
+    for url, ext_data in extensions.items():
+        if isinstance(ext_data, list) and len(ext_data) > 0:
+            if isinstance(ext_data[0], list):  # Node list
+                valid_extensions += 1
+    return set(data), True, valid_extensions
+
+
+def _scan_wrapped_file(data_file: Path) -> Tuple[Set[str], bool, int]:
+    """Summarize a Manager data file like _summarize_wrapped, but streaming.
+
+    Walks ijson parse events instead of loading the file, so only one token
+    is held at a time however large the extension map grows.
+    """
+    fields = set()
+    extensions_is_dict = False
+    valid_extensions = 0
+    seen_extensions = False
+    # Position within the current extension entry: 'value' right after its
+    # key, 'first' right after its value opened as a list
+    expect = None
+
+    with open(data_file, 'rb') as f:
+        for prefix, event, value in json_utils.ijson.parse(f):
+            if prefix == '':
+                if event == 'map_key':
+                    fields.add(value)
+                continue
+
+            if prefix == 'extensions':
+                if not seen_extensions:
+                    # First event of the top-level extensions value
+                    seen_extensions = True
+                    extensions_is_dict = event == 'start_map'
+                elif extensions_is_dict and event == 'map_key':
+                    expect = 'value'
+                    continue
+
+            if expect == 'value':
+                expect = 'first' if event == 'start_array' else None
+            elif expect == 'first':
+                if event == 'start_array':  # Node list
+                    valid_extensions += 1
+                expect = None
+
+    return fields, extensions_is_dict, valid_extensions
+
+
 class ManagerDataFetcher:
     """Fetches and caches ComfyUI Manager extension data."""
 
     MANAGER_URL = "https://raw.githubusercontent.com/ltdrdata/ComfyUI-Manager/main/extension-node-map.json"
 
-    def __init__(self, timeout: int = 30):
+    def __init__(self, timeout: int = 30, session: Optional[aiohttp.ClientSession] = None,
+                 max_age_hours: float = 6):
         self.timeout = timeout
+        self.max_age_hours = max_age_hours
+        self.session = session  # Shared HTTP session (a private one is opened if None)
+        self.data: Optional[Dict[str, Any]] = None  # Wrapped data from the last fetch
 
     async def fetch(self, output_file: Path, force: bool = False) -> bool:
         """
@@ -30,73 +99,38 @@ class ManagerDataFetcher:
 
         Args:
             output_file: Path to save the data
-            force: Force fetch even if file exists and is recent
+            force: Force fetch even if file exists and is younger than max_age_hours
 
         Returns:
             True if fetched successfully, False otherwise
         """
-        # Check if we need to fetch
-        if not force and output_file.exists():
+        # Check if we need to fetch. The file is only ever written right after
+        # a fetch, so its mtime stands in for fetched_at without parsing it
+        if not force:
             try:
-                with open(output_file) as f:
-                    existing_data = json.load(f)
-                fetched_at = existing_data.get("fetched_at", "")
-                if fetched_at:
-                    # Check if less than 6 hours old
-                    fetch_time = datetime.fromisoformat(fetched_at)
-                    hours_old = (datetime.now() - fetch_time).total_seconds() / 3600
-                    if hours_old < 6:
-                        logger.info(f"Manager data is recent ({hours_old:.1f}h old), skipping fetch")
-                        return True
-            except Exception as e:
+                hours_old = (time.time() - output_file.stat().st_mtime) / 3600
+                if hours_old < self.max_age_hours:
+                    logger.info(f"Manager data is recent ({hours_old:.1f}h old), skipping fetch")
+                    return True
+            except FileNotFoundError:
+                pass
+            except OSError as e:
                 logger.warning(f"Could not check existing file age: {e}")
 
         logger.info(f"Fetching Manager extension data from {self.MANAGER_URL}")
 
+        # Revalidate the existing file rather than re-downloading it, unless
+        # forced (a forced fetch may be repairing a bad local copy)
+        headers = {}
+        if not force and output_file.exists():
+            headers = self._conditional_headers(output_file)
+
         try:
             timeout = aiohttp.ClientTimeout(total=self.timeout)
+            if self.session is not None:
+                return await self._download(self.session, output_file, timeout, headers)
             async with aiohttp.ClientSession(timeout=timeout) as session:
-                async with session.get(self.MANAGER_URL) as response:
-                    if response.status == 200:
-                        # GitHub raw URLs return text/plain, so get text and parse manually
-                        text_content = await response.text()
-                        data = json.loads(text_content)
-
-                        # Validate data structure
-                        if not isinstance(data, dict):
-                            logger.error("Invalid data format: expected dict")
-                            return False
-
-                        # Wrap with metadata
-                        wrapped_data = {
-                            "fetched_at": datetime.now().isoformat(),
-                            "source": self.MANAGER_URL,
-                            "extension_count": len(data),
-                            "extensions": data
-                        }
-
-                        # Ensure output directory exists
-                        output_file.parent.mkdir(parents=True, exist_ok=True)
-
-                        # Atomic write
-                        temp_file = output_file.with_suffix('.tmp')
-                        try:
-                            with open(temp_file, 'w') as f:
-                                json.dump(wrapped_data, f, indent=2)
-                            temp_file.replace(output_file)
-
-                            file_size = output_file.stat().st_size / 1024
-                            logger.info(f"✅ Fetched {len(data)} Manager extensions ({file_size:.1f} KB)")
-                            return True
-
-                        finally:
-                            if temp_file.exists():
-                                temp_file.unlink()
-
-                    else:
-                        logger.error(f"Failed to fetch Manager data: HTTP {response.status}")
-                        return False
-
+                return await self._download(session, output_file, timeout, headers)
         except asyncio.TimeoutError:
             logger.error(f"Timeout fetching Manager data ({self.timeout}s)")
             return False
@@ -104,32 +138,123 @@ class ManagerDataFetcher:
             logger.error(f"Failed to fetch Manager data: {e}")
             return False
 
-    def validate_data(self, data_file: Path) -> bool:
-        """Validate Manager data file structure."""
+    @staticmethod
+    def validators_file(output_file: Path) -> Path:
+        """Sidecar holding the HTTP cache validators of output_file."""
+        return output_file.with_suffix('.etag')
+
+    def _conditional_headers(self, output_file: Path) -> Dict[str, str]:
+        """Conditional GET headers from the validators saved with output_file."""
+        try:
+            validators = json_utils.load(self.validators_file(output_file))
+        except (OSError, ValueError):
+            return {}
+
+        headers = {}
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+        return headers
+
+    def _save_validators(self, output_file: Path, response_headers) -> None:
+        """Save the response's ETag/Last-Modified next to output_file."""
+        validators_file = self.validators_file(output_file)
+        validators = {
+            key: response_headers[header]
+            for key, header in (("etag", "ETag"), ("last_modified", "Last-Modified"))
+            if header in response_headers
+        }
+        if validators:
+            validators_file.write_bytes(json_utils.dumps(validators))
+        else:
+            validators_file.unlink(missing_ok=True)
+
+    async def _download(self, session: aiohttp.ClientSession, output_file: Path,
+                        timeout: aiohttp.ClientTimeout, headers: Dict[str, str]) -> bool:
+        """Download the Manager map with the given session and save it."""
+        async with session.get(self.MANAGER_URL, timeout=timeout, headers=headers) as response:
+            if response.status == 304:
+                # Unchanged upstream: keep the file and restart its freshness
+                # window (fetched_at inside keeps the original download time)
+                os.utime(output_file)
+                logger.info("Manager data unchanged (HTTP 304), keeping existing file")
+                return True
+
+            if response.status == 200:
+                # GitHub raw URLs return text/plain, so parse the body stream
+                # manually; entries are decoded while the download continues
+                try:
+                    data = await json_utils.aload_object(response.content)
+                except ValueError:
+                    logger.error("Invalid data format: expected dict")
+                    return False
+
+                # Wrap with metadata
+                wrapped_data = {
+                    "fetched_at": datetime.now().isoformat(),
+                    "source": self.MANAGER_URL,
+                    "extension_count": len(data),
+                    "extensions": data
+                }
+
+                # Ensure output directory exists
+                output_file.parent.mkdir(parents=True, exist_ok=True)
+
+                # Atomic write (compact: the file is only read by the augmenter)
+                temp_file = output_file.with_suffix('.tmp')
+                try:
+                    with open(temp_file, 'wb') as f:
+                        f.write(json_utils.dumps(wrapped_data))
+                        # Durable before the rename, or a crash can leave an empty file
+                        f.flush()
+                        os.fsync(f.fileno())
+                    temp_file.replace(output_file)
+                except Exception:
+                    temp_file.unlink(missing_ok=True)
+                    raise
+                # Saved after the data, so validators never describe a newer
+                # file than the one on disk
+                self._save_validators(output_file, response.headers)
+
+                file_size = output_file.stat().st_size / 1024
+                logger.info(f"✅ Fetched {len(data)} Manager extensions ({file_size:.1f} KB)")
+                self.data = wrapped_data
+                return True
+
+            else:
+                logger.error(f"Failed to fetch Manager data: HTTP {response.status}")
+                return False
+
+    def validate_data(self, data_file: Path, data: Optional[Dict[str, Any]] = None) -> bool:
+        """Validate Manager data file structure.
+
+        The file is streamed with ijson when available rather than loaded.
+
+        Args:
+            data_file: Wrapped Manager data file
+            data: Already-loaded contents of data_file (read from disk if None)
+        """
         try:
-            with open(data_file) as f:
-                data = json.load(f)
+            if data is not None:
+                fields, extensions_is_dict, valid_extensions = _summarize_wrapped(data)
+            elif json_utils.ijson is not None:
+                fields, extensions_is_dict, valid_extensions = _scan_wrapped_file(data_file)
+            else:
+                fields, extensions_is_dict, valid_extensions = _summarize_wrapped(json_utils.load(data_file))
 
             # Check required fields
             required = ["fetched_at", "source", "extension_count", "extensions"]
             for field in required:
-                if field not in data:
+                if field not in fields:
                     logger.error(f"Missing required field: {field}")
                     return False
 
             # Validate extensions data
-            extensions = data["extensions"]
-            if not isinstance(extensions, dict):
+            if not extensions_is_dict:
                 logger.error("Extensions field must be a dict")
                 return False
 
-            # Count and validate structure
-            valid_extensions = 0
-            for url, ext_data in extensions.items():
-                if isinstance(ext_data, list) and len(ext_data) > 0:
-                    if isinstance(ext_data[0], list):  # Node list
-                        valid_extensions += 1
-
             logger.info(f"Validation passed: {valid_extensions} valid extensions")
             return True
 
@@ -153,6 +278,12 @@ async def main():
         action="store_true",
         help="Force fetch even if file is recent"
     )
+    parser.add_argument(
+        "--max-age-hours",
+        type=float,
+        default=6,
+        help="Refetch when the existing file is older than this (default: 6)"
+    )
     parser.add_argument(
         "--validate",
         action="store_true",
@@ -176,7 +307,7 @@ async def main():
     # Set logging level
     logging.getLogger().setLevel(getattr(logging, args.log_level))
 
-    fetcher = ManagerDataFetcher(timeout=args.timeout)
+    fetcher = ManagerDataFetcher(timeout=args.timeout, max_age_hours=args.max_age_hours)
 
     if args.validate:
         # Validate existing file
@@ -194,8 +325,8 @@ async def main():
         # Fetch data
         success = await fetcher.fetch(args.output, force=args.force)
         if success:
-            # Validate what we just fetched
-            if fetcher.validate_data(args.output):
+            # Validate what we just fetched (reusing the parsed data if any)
+            if fetcher.validate_data(args.output, fetcher.data):
                 logger.info("✅ Fetch and validation completed successfully")
                 return 0
             else:
@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""JSON serialization helpers.
+
+Uses orjson when it is installed and falls back to the stdlib json module
+otherwise, so every script keeps working without the optional dependency.
+Likewise, ijson is used for streaming large arrays when available.
+"""
+
+import json
+import mmap
+import os
+from itertools import takewhile
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on environment
+    orjson = None
+
+try:
+    import ijson
+except ImportError:  # pragma: no cover - depends on environment
+    ijson = None
+
+_SCALAR_EVENTS = ('string', 'number', 'boolean', 'null')
+_CONTAINER_KINDS = {'start_array': list, 'start_map': dict}
+_STREAM_HEAD_SIZE = 64 * 1024
+
+# Raised for malformed documents by every reader here (orjson's error
+# subclasses json.JSONDecodeError)
+DECODE_ERRORS = (json.JSONDecodeError,) if ijson is None else (json.JSONDecodeError, ijson.JSONError)
+
+
+class _PrefixedStream:
+    """Async byte stream that replays an already-consumed first chunk."""
+
+    def __init__(self, head: bytes, stream: Any):
+        self._head = head
+        self._stream = stream
+
+    async def read(self, n: int = -1) -> bytes:
+        # ijson probes the stream type with read(0), so only replay on a real read
+        if self._head and n != 0:
+            head, self._head = self._head, b''
+            return head
+        return await self._stream.read(n)
+
+
+def loads(data: bytes) -> Any:
+    """Deserialize a JSON document from bytes or str.
+
+    Raises:
+        json.JSONDecodeError: If the document is invalid (orjson's error is a subclass)
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def load(path: Path) -> Any:
+    """Read and deserialize a JSON file.
+
+    With orjson the file is memory-mapped and parsed in place, so large
+    caches are never copied into an intermediate Python bytes/str object.
+    """
+    if orjson is None:
+        return json.loads(Path(path).read_bytes())
+
+    with open(path, 'rb') as f:
+        if f.seek(0, 2) == 0:
+            # mmap can't map empty files; let orjson raise the usual error
+            return orjson.loads(b'')
+        # ACCESS_READ is portable (PROT_READ on POSIX, FILE_MAP_READ on Windows)
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            with memoryview(mm) as view:
+                return orjson.loads(view)
+
+
+def dumps(obj: Any, indent: bool = False) -> bytes:
+    """Serialize obj to UTF-8 JSON bytes.
+
+    Args:
+        obj: JSON-serializable object
+        indent: Pretty-print with 2-space indentation (compact otherwise)
+
+    Returns:
+        Encoded JSON document
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+
+    if indent:
+        return json.dumps(obj, indent=2, ensure_ascii=False).encode('utf-8')
+    return json.dumps(obj, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def dump_streaming(
+    obj: Dict[str, Any],
+    path: Path,
+    stream_keys: Iterable[str] = (),
+    transforms: Optional[Dict[str, Callable[[Any], Any]]] = None,
+    fsync: bool = False
+):
+    """Write a pretty-printed JSON object, serializing large maps entry by entry.
+
+    Output is byte-identical to ``dumps(obj, indent=True)``, but each value
+    of the top-level maps named in ``stream_keys`` is encoded and written on
+    its own, so the whole document is never held in memory as bytes.
+
+    Args:
+        obj: Top-level JSON object
+        path: Destination file
+        stream_keys: Top-level keys whose dict values are streamed per entry
+        transforms: Per stream key, a function applied to each entry value
+            just before it is written (so a transformed copy of the whole
+            map is never built)
+        fsync: Flush the file to disk before returning, so an atomic
+            replace of it can't leave an empty file after a crash
+    """
+    stream_keys = set(stream_keys)
+    transforms = transforms or {}
+
+    with open(path, 'wb', buffering=1024 * 1024) as f:
+        if not obj:
+            f.write(b'{}')
+            return
+
+        f.write(b'{')
+        for i, (key, value) in enumerate(obj.items()):
+            f.write(b',\n  ' if i else b'\n  ')
+            f.write(dumps(key) + b': ')
+
+            if key in stream_keys and isinstance(value, dict) and value:
+                transform = transforms.get(key)
+                f.write(b'{')
+                for j, (item_key, item_value) in enumerate(value.items()):
+                    if transform is not None:
+                        item_value = transform(item_value)
+                    f.write(b',\n    ' if j else b'\n    ')
+                    f.write(dumps(item_key) + b': ')
+                    # Raw newlines only occur between tokens, never inside strings
+                    f.write(dumps(item_value, indent=True).replace(b'\n', b'\n    '))
+                f.write(b'\n  }')
+            else:
+                f.write(dumps(value, indent=True).replace(b'\n', b'\n  '))
+        f.write(b'\n}')
+
+        if fsync:
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def _read_header(events: Iterator[Tuple[str, str, Any]], key: str) -> Tuple[Dict[str, Any], Optional[type]]:
+    """Decode the top-level fields that precede ``key`` from ijson parse events.
+
+    Returns:
+        (header, kind): the fields read, and the type of ``key``'s value
+        (None if the object has no such key)
+    """
+    header = {}
+    builder = None
+    current_key = None
+    for prefix, event, value in events:
+        if builder is not None:
+            builder.event(event, value)
+            if prefix == current_key and event in ('end_array', 'end_map'):
+                header[current_key] = builder.value
+                builder = None
+        elif prefix == '' and event == 'map_key':
+            current_key = value
+            if value == key:
+                _, event, value = next(events)
+                return header, _CONTAINER_KINDS.get(event) or type(value)
+        elif prefix == current_key:
+            if event in _SCALAR_EVENTS:
+                header[current_key] = value
+            else:
+                builder = ijson.ObjectBuilder()
+                builder.event(event, value)
+    return header, None
+
+
+def iter_member(path: Path, key: str) -> Tuple[Dict[str, Any], Optional[type], Iterator[Any]]:
+    """Stream the contents of one top-level member without loading the whole file.
+
+    With ijson the document is parsed incrementally, so only one entry is
+    materialized at a time. Without it the file is loaded normally.
+
+    Args:
+        path: JSON file whose root is an object
+        key: Top-level key holding the array or object to stream
+
+    Returns:
+        (header, kind, entries): top-level fields that precede ``key`` in
+        the file, the type of its value (None if it is missing), and an
+        iterator over the items of an array or the (name, value) pairs of
+        an object (empty for any other type)
+    """
+    if ijson is None:
+        data = load(path)
+        header = dict(takewhile(lambda item: item[0] != key, data.items()))
+        value = data.get(key)
+        kind = type(value) if key in data else None
+        if kind is list:
+            return header, kind, iter(value)
+        if kind is dict:
+            return header, kind, iter(value.items())
+        return header, kind, iter(())
+
+    # The header is read in a short pass of its own: ijson's item builders
+    # are much faster fed straight from the file than from parse events
+    with open(path, 'rb') as f:
+        header, kind = _read_header(ijson.parse(f, use_float=True), key)
+
+    if kind is not list and kind is not dict:
+        return header, kind, iter(())
+
+    def entries():
+        with open(path, 'rb') as f:
+            if kind is list:
+                yield from ijson.items(f, f'{key}.item', use_float=True)
+            else:
+                yield from ijson.kvitems(f, key, use_float=True)
+
+    return header, kind, entries()
+
+
+def iter_array(path: Path, key: str) -> Tuple[Dict[str, Any], Iterator[Any]]:
+    """Stream the items of a top-level array without loading the whole file.
+
+    Args:
+        path: JSON file whose root is an object
+        key: Top-level key holding the array to stream
+
+    Returns:
+        (header, items): top-level fields that precede ``key`` in the file,
+        and an iterator over the array items (empty if it is not an array)
+    """
+    header, kind, items = iter_member(path, key)
+    return header, items if kind is list else iter(())
+
+
+def load_member(path: Path, key: str, default: Any = None) -> Any:
+    """Decode a single top-level member, skipping over the rest of the file.
+
+    Args:
+        path: JSON file whose root is an object
+        key: Top-level key to decode
+        default: Returned if the document has no such key
+
+    Returns:
+        The decoded value of ``key``
+    """
+    if ijson is None:
+        return load(path).get(key, default)
+
+    with open(path, 'rb') as f:
+        return next(ijson.items(f, key, use_float=True), default)
+
+
+async def aload_object(stream: Any) -> Dict[str, Any]:
+    """Parse a JSON object from an async byte stream while it is received.
+
+    With ijson each top-level entry is decoded as soon as its bytes arrive,
+    so the raw document is never buffered (or decoded to str) in full.
+    Without it the stream is read to the end and parsed with loads().
+
+    Args:
+        stream: Object with an async read(n) returning bytes, e.g. aiohttp's
+            response.content
+
+    Returns:
+        The decoded top-level object
+
+    Raises:
+        ValueError: If the document root is not a JSON object
+    """
+    if ijson is None:
+        data = loads(await stream.read())
+        if not isinstance(data, dict):
+            raise ValueError("expected a JSON object")
+        return data
+
+    # kvitems silently yields nothing for a non-object root, so check first
+    head = await stream.read(_STREAM_HEAD_SIZE)
+    if head.lstrip()[:1] != b'{':
+        raise ValueError("expected a JSON object")
+
+    return {
+        key: value
+        async for key, value in ijson.kvitems_async(_PrefixedStream(head, stream), '', use_float=True)
+    }
@@ -3,6 +3,10 @@
 
 import asyncio
 import json
+import math
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
 from typing import Dict, List, Optional
 
 import aiohttp
@@ -11,35 +15,152 @@ from logging import getLogger
 logger = getLogger(__name__)
 
 
-class RegistryClient:
-    """Async client for ComfyUI registry API."""
+# Longest Retry-After honored; anything beyond it is clamped
+MAX_RETRY_AFTER = 300.0
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header (delta-seconds or HTTP-date) into seconds.
+
+    Returns None for missing, malformed or non-finite values; delays are
+    clamped to ``[0, MAX_RETRY_AFTER]``.
+    """
+    if not value:
+        return None
+    try:
+        delay = float(value)
+    except ValueError:
+        try:
+            retry_at = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        if retry_at.tzinfo is None:
+            retry_at = retry_at.replace(tzinfo=timezone.utc)
+        delay = (retry_at - datetime.now(timezone.utc)).total_seconds()
+    if not math.isfinite(delay):
+        return None
+    return min(max(delay, 0.0), MAX_RETRY_AFTER)
+
+
+class AsyncTokenBucket:
+    """Adaptive token bucket shared by concurrent requests.
+
+    Tokens refill at ``rate`` per second up to ``burst``. A rate-limited
+    response halves the rate and holds every caller until the server's
+    Retry-After has passed; each successful response raises the rate by 5%,
+    up to ``max_rate``.
+    """
+
+    def __init__(self, rate: float, burst: int = 1, min_rate: float = 0.5, max_rate: float = 20.0):
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.rate = min(max(rate, min_rate), max_rate)
+        self.burst = burst
+        self._tokens = float(burst)
+        self._last_refill = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float):
+        elapsed = now - self._last_refill
+        self._tokens = min(self.burst, self._tokens + elapsed * self.rate)
+        self._last_refill = now
+
+    async def acquire(self):
+        """Wait until a request may be sent."""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._blocked_until:
+                    await asyncio.sleep(self._blocked_until - now)
+                    continue
+
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    def backoff(self, retry_after: float):
+        """Slow down after a rate-limited response."""
+        self.rate = max(self.min_rate, self.rate / 2)
+        self._blocked_until = max(self._blocked_until, time.monotonic() + retry_after)
+        self._tokens = 0.0
+        logger.debug("Rate limited, pausing %.1fs and lowering rate to %.2f req/s", retry_after, self.rate)
+
+    def recover(self):
+        """Speed up after a successful response."""
+        self.rate = min(self.max_rate, self.rate * 1.05)
+
+
+def create_session(limit: int, limit_per_host: int) -> aiohttp.ClientSession:
+    """Create a keep-alive HTTP session with a bounded connection pool.
+
+    Stale keep-alive disconnects surface as ClientConnectionError and are
+    retried by the per-request retry loops.
+
+    Args:
+        limit: Total connection pool size
+        limit_per_host: Connection cap per host
+
+    Returns:
+        New session; the caller owns it and must close it
+    """
+    connector = aiohttp.TCPConnector(
+        limit=limit,
+        limit_per_host=limit_per_host,
+        keepalive_timeout=30,
+        ttl_dns_cache=300
+    )
+    timeout = aiohttp.ClientTimeout(
+        total=30,
+        connect=10,
+        sock_read=10
+    )
+    return aiohttp.ClientSession(
+        connector=connector,
+        timeout=timeout
+    )
+
 
-    def __init__(self, base_url: str = "https://api.comfy.org", concurrency: int = 10, max_retries: int = 3):
+class RegistryClient:
+    """Async client for ComfyUI registry API.
+
+    Opens its own session on enter unless one is passed in, in which case
+    the caller's connection pool is reused and left open on exit.
+    """
+
+    def __init__(
+        self,
+        base_url: str = "https://api.comfy.org",
+        concurrency: int = 10,
+        max_retries: int = 3,
+        rate_limiter: Optional[AsyncTokenBucket] = None,
+        connector_limit: Optional[int] = None,
+        session: Optional[aiohttp.ClientSession] = None
+    ):
         self.base_url = base_url
-        self.session = None
+        self.session = session
+        self._owns_session = session is None
         self.concurrency = concurrency
         self.max_retries = max_retries
         self.semaphore = asyncio.Semaphore(concurrency)
+        self.rate_limiter = rate_limiter
+        # Connection pool size; every request goes to one host, so the
+        # per-host limit is the effective cap
+        self.connector_limit = connector_limit or max(concurrency * 2, 100)
+        self.connector_limit_per_host = connector_limit or max(concurrency, 50)
 
     async def __aenter__(self):
-        connector = aiohttp.TCPConnector(
-            limit=max(self.concurrency * 2, 100),
-            limit_per_host=max(self.concurrency, 50),
-            force_close=True
-        )
-        timeout = aiohttp.ClientTimeout(
-            total=30,
-            connect=10,
-            sock_read=10
-        )
-        self.session = aiohttp.ClientSession(
-            connector=connector,
-            timeout=timeout
-        )
+        # Every request goes to the same host, so keep connections alive and
+        # reuse them instead of paying a TCP + TLS handshake per request
+        if self._owns_session:
+            self.session = create_session(self.connector_limit, self.connector_limit_per_host)
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        if self.session:
+        if self._owns_session and self.session:
             await self.session.close()
 
     async def get_all_nodes(self, page_size: int = 100, max_pages: Optional[int] = None) -> List[Dict]:
@@ -53,7 +174,7 @@ class RegistryClient:
                 logger.info(f"Reached max_pages limit ({max_pages})")
                 break
 
-            logger.debug(f"Fetching nodes page {page}...")
+            logger.debug("Fetching nodes page %d...", page)
             url = f"{self.base_url}/nodes"
             params = {"page": page, "limit": page_size}
 
@@ -68,7 +189,7 @@ class RegistryClient:
 
                     if nodes:
                         all_nodes.extend(nodes)
-                        logger.debug(f"Page {page}: Found {len(nodes)} nodes")
+                        logger.debug("Page %d: Found %d nodes", page, len(nodes))
 
                     if total_pages is None:
                         total_pages = data.get("totalPages", 1)
@@ -108,12 +229,18 @@ class RegistryClient:
 
         for attempt in range(self.max_retries):
             try:
+                if self.rate_limiter:
+                    await self.rate_limiter.acquire()
                 async with self.session.get(url) as response:
                     if response.status == 429:
-                        # Rate limited - wait with exponential backoff
-                        if attempt < self.max_retries - 1:
+                        # Rate limited - honor Retry-After, else exponential backoff
+                        delay = parse_retry_after(response.headers.get("Retry-After"))
+                        if delay is None:
                             delay = base_delay * (2 ** attempt)
-                            logger.debug(f"Rate limited for {node_id}, retrying in {delay}s (attempt {attempt + 1}/{self.max_retries})")
+                        if self.rate_limiter:
+                            self.rate_limiter.backoff(delay)
+                        if attempt < self.max_retries - 1:
+                            logger.debug("Rate limited for %s, retrying in %ss (attempt %d/%d)", node_id, delay, attempt + 1, self.max_retries)
                             await asyncio.sleep(delay)
                             continue
                         else:
@@ -121,9 +248,12 @@ class RegistryClient:
                             return []
 
                     if response.status != 200:
-                        logger.debug(f"No versions for {node_id}: {response.status}")
+                        logger.debug("No versions for %s: %s", node_id, response.status)
                         return []
 
+                    if self.rate_limiter:
+                        self.rate_limiter.recover()
+
                     versions = await response.json()
                     if not isinstance(versions, list):
                         logger.warning(f"Unexpected versions format for {node_id}")
@@ -138,7 +268,7 @@ class RegistryClient:
             except Exception as e:
                 if attempt < self.max_retries - 1:
                     delay = base_delay * (2 ** attempt)
-                    logger.debug(f"Error fetching versions for {node_id}: {e}, retrying in {delay}s")
+                    logger.debug("Error fetching versions for %s: %s, retrying in %ss", node_id, e, delay)
                     await asyncio.sleep(delay)
                 else:
                     logger.warning(f"Error fetching versions for {node_id} after {self.max_retries} attempts: {e}")
@@ -152,13 +282,15 @@ class RegistryClient:
         params = {"version": version}
 
         try:
+            if self.rate_limiter:
+                await self.rate_limiter.acquire()
             async with self.session.get(url, params=params) as response:
                 if response.status != 200:
-                    logger.debug(f"No install info for {node_id}@{version}")
+                    logger.debug("No install info for %s@%s", node_id, version)
                     return None
                 return await response.json()
         except Exception as e:
-            logger.debug(f"Error fetching install info for {node_id}@{version}: {e}")
+            logger.debug("Error fetching install info for %s@%s: %s", node_id, version, e)
             return None
 
     async def get_comfy_nodes(self, node_id: str, version: str) -> Optional[List[Dict]]:
@@ -182,12 +314,18 @@ class RegistryClient:
             page_fetched = False
             for attempt in range(self.max_retries):
                 try:
+                    if self.rate_limiter:
+                        await self.rate_limiter.acquire()
                     async with self.session.get(url, params=params) as response:
                         if response.status == 429:
-                            # Rate limited - retry with exponential backoff
-                            if attempt < self.max_retries - 1:
+                            # Rate limited - honor Retry-After, else exponential backoff
+                            delay = parse_retry_after(response.headers.get("Retry-After"))
+                            if delay is None:
                                 delay = base_delay * (2 ** attempt)
-                                logger.debug(f"Rate limited fetching metadata for {node_id}@{version} page {page}, retrying in {delay}s (attempt {attempt + 1}/{self.max_retries})")
+                            if self.rate_limiter:
+                                self.rate_limiter.backoff(delay)
+                            if attempt < self.max_retries - 1:
+                                logger.debug("Rate limited fetching metadata for %s@%s page %d, retrying in %ss (attempt %d/%d)", node_id, version, page, delay, attempt + 1, self.max_retries)
                                 await asyncio.sleep(delay)
                                 continue
                             else:
@@ -197,26 +335,29 @@ class RegistryClient:
                         if response.status == 404:
                             # No metadata exists for this version (this is OK, cache it as empty)
                             if page == 1:
-                                logger.debug(f"No comfy-nodes metadata exists for {node_id}@{version}")
+                                logger.debug("No comfy-nodes metadata exists for %s@%s", node_id, version)
                             return []  # Empty list means "successfully fetched, but empty"
 
                         if response.status != 200:
                             # Other error - don't cache, allow retry later
                             if page == 1:
-                                logger.debug(f"Error status {response.status} for {node_id}@{version}")
+                                logger.debug("Error status %s for %s@%s", response.status, node_id, version)
                             return None
 
+                        if self.rate_limiter:
+                            self.rate_limiter.recover()
+
                         data = await response.json()
                         comfy_nodes = data.get("comfy_nodes", [])
 
                         if comfy_nodes:
                             all_comfy_nodes.extend(comfy_nodes)
-                            logger.debug(f"Page {page}: Found {len(comfy_nodes)} comfy-nodes for {node_id}@{version}")
+                            logger.debug("Page %d: Found %d comfy-nodes for %s@%s", page, len(comfy_nodes), node_id, version)
 
                         if total_pages is None:
                             total_pages = data.get("totalPages", data.get("totalNumberOfPages", 1))
                             if total_pages > 1:
-                                logger.debug(f"Node {node_id}@{version} has {total_pages} pages of metadata")
+                                logger.debug("Node %s@%s has %s pages of metadata", node_id, version, total_pages)
 
                         page_fetched = True
                         break  # Success, exit retry loop
@@ -224,7 +365,7 @@ class RegistryClient:
                 except Exception as e:
                     if attempt < self.max_retries - 1:
                         delay = base_delay * (2 ** attempt)
-                        logger.debug(f"Error fetching comfy-nodes page {page} for {node_id}@{version}: {e}, retrying in {delay}s")
+                        logger.debug("Error fetching comfy-nodes page %d for %s@%s: %s, retrying in %ss", page, node_id, version, e, delay)
                         await asyncio.sleep(delay)
                     else:
                         logger.warning(f"Error fetching comfy-nodes page {page} for {node_id}@{version} after {self.max_retries} attempts: {e}")
@@ -238,9 +379,10 @@ class RegistryClient:
                 break
 
             page += 1
-            await asyncio.sleep(0.05)
+            if not self.rate_limiter:
+                await asyncio.sleep(0.05)
 
         if all_comfy_nodes:
-            logger.debug(f"Total: Found {len(all_comfy_nodes)} comfy-nodes across {page} pages for {node_id}@{version}")
+            logger.debug("Total: Found %d comfy-nodes across %d pages for %s@%s", len(all_comfy_nodes), page, node_id, version)
 
         return all_comfy_nodes  # Return list (may be empty if no nodes, but fetch was successful)
\ No newline at end of file
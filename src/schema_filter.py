@@ -7,14 +7,37 @@ by excluding unused fields. Uses Python 3.11+ stdlib tomllib for TOML parsing.
 
 import tomllib
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, FrozenSet
 from logging import getLogger
 
+import json_utils
+
 logger = getLogger(__name__)
 
 
+def _disabled_fields(section: Dict[str, Any]) -> FrozenSet[str]:
+    """Fields a schema section turns off (fields it doesn't list are kept)."""
+    return frozenset(field for field, enabled in section.items() if not enabled)
+
+
+def _drop_fields(entry: Dict[str, Any], drop: FrozenSet[str]) -> Dict[str, Any]:
+    """Remove the dropped fields from entry in place and return it."""
+    if len(drop) <= len(entry):
+        for field in drop:
+            entry.pop(field, None)
+    else:
+        for field in [field for field in entry if field in drop]:
+            del entry[field]
+    return entry
+
+
 class SchemaFilter:
-    """Filters node mappings output based on schema configuration."""
+    """Filters node mappings output based on schema configuration.
+
+    Packages, versions and mapping entries are filtered in place (dropped
+    fields are deleted from the input dicts), since the pipeline owns the
+    data it filters and never reads the unfiltered form afterwards.
+    """
 
     def __init__(self, config_path: Path):
         """Initialize filter with schema configuration.
@@ -25,6 +48,11 @@ class SchemaFilter:
         self.config_path = config_path
         self.config = None
 
+        # Per-section fields to drop, resolved once instead of per entry
+        self._package_drop: FrozenSet[str] = frozenset()
+        self._version_drop: FrozenSet[str] = frozenset()
+        self._mapping_drop: FrozenSet[str] = frozenset()
+
         if not config_path.exists():
             logger.warning(f"Schema config not found: {config_path}, will not filter output")
             return
@@ -36,6 +64,11 @@ class SchemaFilter:
         except Exception as e:
             logger.error(f"Failed to load schema config: {e}, will not filter output")
             self.config = None
+            return
+
+        self._package_drop = _disabled_fields(self.config.get('packages', {}))
+        self._version_drop = _disabled_fields(self.config.get('versions', {}))
+        self._mapping_drop = _disabled_fields(self.config.get('mappings', {}))
 
     def filter_mappings_output(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """Filter complete mappings output structure.
@@ -60,6 +93,48 @@ class SchemaFilter:
 
         return filtered
 
+    def dump_filtered(self, data: Dict[str, Any], output_file: Path):
+        """Filter and write mappings output in a single pass.
+
+        Writes the same bytes as dumping ``filter_mappings_output(data)`` with
+        indentation, but each mapping and package is filtered just before it
+        is serialized, so no filtered copy of the document is built.
+
+        Args:
+            data: Full mappings output dict
+            output_file: Destination file
+        """
+        if not self.config:
+            json_utils.dump_streaming(data, output_file, stream_keys=("mappings", "packages"))
+            return
+
+        # Same top-level structure as filter_mappings_output
+        output = {
+            "version": data.get("version"),
+            "generated_at": data.get("generated_at"),
+            "stats": data.get("stats"),
+            "mappings": data.get("mappings", {}),
+            "packages": data.get("packages", {})
+        }
+
+        transforms = {"packages": self.filter_package}
+        if self._mapping_drop:
+            filter_mapping = self.filter_mapping
+
+            def filter_entries(entries):
+                for entry in entries:
+                    filter_mapping(entry)
+                return entries
+
+            transforms["mappings"] = filter_entries
+
+        json_utils.dump_streaming(
+            output,
+            output_file,
+            stream_keys=("mappings", "packages"),
+            transforms=transforms
+        )
+
     def filter_packages_section(self, packages: Dict[str, Any]) -> Dict[str, Any]:
         """Filter packages dictionary.
 
@@ -67,15 +142,15 @@ class SchemaFilter:
             packages: Dict of package_id -> package data
 
         Returns:
-            Filtered packages dict
+            The packages dict, filtered in place
         """
         if not self.config:
             return packages
 
-        return {
-            pkg_id: self.filter_package(pkg_data)
-            for pkg_id, pkg_data in packages.items()
-        }
+        filter_package = self.filter_package
+        for pkg_data in packages.values():
+            filter_package(pkg_data)
+        return packages
 
     def filter_package(self, package: Dict[str, Any]) -> Dict[str, Any]:
         """Filter single package based on schema config.
@@ -84,23 +159,18 @@ class SchemaFilter:
             package: Package data dict
 
         Returns:
-            Filtered package dict
+            The package dict, filtered in place
         """
         if not self.config:
             return package
 
-        enabled_fields = self.config.get('packages', {})
-        filtered = {}
+        _drop_fields(package, self._package_drop)
 
-        for field, value in package.items():
-            # Special handling for nested versions dict
-            if field == 'versions':
-                if enabled_fields.get('versions', True):
-                    filtered['versions'] = self.filter_versions_dict(value)
-            elif enabled_fields.get(field, True):  # Default to include
-                filtered[field] = value
+        # Special handling for nested versions dict
+        if 'versions' in package:
+            self.filter_versions_dict(package['versions'])
 
-        return filtered
+        return package
 
     def filter_versions_dict(self, versions: Dict[str, Any]) -> Dict[str, Any]:
         """Filter versions dictionary.
@@ -109,15 +179,15 @@ class SchemaFilter:
             versions: Dict of version -> version data
 
         Returns:
-            Filtered versions dict
+            The versions dict, filtered in place
         """
-        if not self.config:
+        if not self.config or not self._version_drop:
             return versions
 
-        return {
-            version_key: self.filter_version(version_data)
-            for version_key, version_data in versions.items()
-        }
+        filter_version = self.filter_version
+        for version_data in versions.values():
+            filter_version(version_data)
+        return versions
 
     def filter_version(self, version: Dict[str, Any]) -> Dict[str, Any]:
         """Filter single version based on schema config.
@@ -126,18 +196,12 @@ class SchemaFilter:
             version: Version data dict
 
         Returns:
-            Filtered version dict
+            The version dict, filtered in place
         """
-        if not self.config:
+        if not self.config or not self._version_drop:
             return version
 
-        enabled_fields = self.config.get('versions', {})
-
-        return {
-            field: value
-            for field, value in version.items()
-            if enabled_fields.get(field, True)  # Default to include
-        }
+        return _drop_fields(version, self._version_drop)
 
     def filter_mappings_section(self, mappings: Dict[str, Any]) -> Dict[str, Any]:
         """Filter mappings dictionary.
@@ -146,15 +210,17 @@ class SchemaFilter:
             mappings: Dict of node_key -> list of mapping entries
 
         Returns:
-            Filtered mappings dict
+            The mappings dict, filtered in place
         """
-        if not self.config:
+        # Nothing to drop (the usual case): skip visiting every entry
+        if not self.config or not self._mapping_drop:
             return mappings
 
-        return {
-            node_key: [self.filter_mapping(entry) for entry in entries]
-            for node_key, entries in mappings.items()
-        }
+        filter_mapping = self.filter_mapping
+        for entries in mappings.values():
+            for entry in entries:
+                filter_mapping(entry)
+        return mappings
 
     def filter_mapping(self, mapping: Dict[str, Any]) -> Dict[str, Any]:
         """Filter single mapping entry based on schema config.
@@ -163,15 +229,9 @@ class SchemaFilter:
             mapping: Mapping entry dict
 
         Returns:
-            Filtered mapping dict
+            The mapping dict, filtered in place
         """
-        if not self.config:
+        if not self.config or not self._mapping_drop:
             return mapping
 
-        enabled_fields = self.config.get('mappings', {})
-
-        return {
-            field: value
-            for field, value in mapping.items()
-            if enabled_fields.get(field, True)  # Default to include
-        }
+        return _drop_fields(mapping, self._mapping_drop)
@@ -6,21 +6,57 @@ Single entry point for all registry data updates.
 
 import argparse
 import asyncio
-import json
+import time
+from dataclasses import asdict, dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
+import aiohttp
+
+import json_utils
 from build_registry_cache import RegistryCacheBuilder
 from build_global_mappings import GlobalMappingsBuilder
 from augment_mappings import MappingsAugmenter
 from fetch_manager_data import ManagerDataFetcher
+from registry_client import create_session
 
 import logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 
+@dataclass(slots=True)
+class UpdateStats:
+    """Timings, sizes and counts collected during an update run."""
+    started_at: str
+    cache_updated_at: Optional[str] = None
+    cache_duration_seconds: float = 0.0
+    cache_size_mb: float = 0.0
+    total_packages: int = 0
+    total_versions: int = 0
+    total_metadata: int = 0
+    manager_extensions: int = 0
+    manager_fetched_at: Optional[str] = None
+    manager_fetch_failed: bool = False
+    mappings_updated_at: Optional[str] = None
+    mappings_duration_seconds: float = 0.0
+    total_signatures: int = 0
+    mappings_size_mb: float = 0.0
+    augmentation_completed_at: Optional[str] = None
+    augmentation_duration_seconds: float = 0.0
+    nodes_added_from_manager: int = 0
+    synthetic_packages_created: int = 0
+    final_mappings_size_mb: float = 0.0
+    completed_at: Optional[str] = None
+    duration_seconds: float = 0.0
+    error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to the state file form, omitting fields never set."""
+        return {key: value for key, value in asdict(self).items() if value is not None}
+
+
 class RegistryOrchestrator:
     """Orchestrates incremental registry data updates."""
 
@@ -30,7 +66,9 @@ class RegistryOrchestrator:
         self.mappings_file = data_dir / "node_mappings.json"
         self.manager_file = data_dir / ".temp_extension-node-map.json"  # Temporary file
         self.state_file = data_dir / ".update_state.json"
-        self.stats: Dict[str, Any] = {"started_at": datetime.now().isoformat()}
+        self.stats = UpdateStats(started_at=datetime.now().isoformat())
+        self._start_time = time.monotonic()  # Durations use the monotonic clock
+        self._temp_files: set[Path] = set()  # Temp/sidecar files to clean up
 
         # Cache builder configuration
         self.concurrency = concurrency
@@ -44,18 +82,33 @@ class RegistryOrchestrator:
         # Ensure data directory exists
         data_dir.mkdir(parents=True, exist_ok=True)
 
-    async def run_update(self, incremental: bool = True) -> Dict[str, Any]:
+    async def run_update(self, incremental: bool = True) -> UpdateStats:
         """Run complete registry update pipeline."""
         logger.info("🚀 Starting registry update pipeline")
         logger.info(f"Data directory: {self.data_dir}")
         logger.info(f"Incremental mode: {incremental}")
 
         try:
-            # Step 1: Update registry cache
-            await self._update_registry_cache(incremental)
-
-            # Step 2: Fetch Manager data (GPL-3, temporary)
-            await self._fetch_manager_data()
+            # One keep-alive connection pool for every HTTP step, sized like
+            # the cache builder's own pool
+            async with create_session(
+                limit=max(self.concurrency * 2, 100),
+                limit_per_host=max(self.concurrency, 50)
+            ) as session:
+                # Steps 1 and 2 hit different hosts and don't depend on each
+                # other, so the Manager fetch overlaps the cache build
+                try:
+                    async with asyncio.TaskGroup() as tg:
+                        # Step 1: Update registry cache
+                        tg.create_task(self._update_registry_cache(incremental, session))
+
+                        # Step 2: Fetch Manager data (GPL-3, temporary)
+                        tg.create_task(self._fetch_manager_data(session))
+                except ExceptionGroup as eg:
+                    # Only the cache build raises (Manager failures are
+                    # recorded in stats), so surface its error directly; the
+                    # group stays chained as the cause, with any other errors
+                    raise eg.exceptions[0] from eg
 
             # Step 3: Update mappings
             await self._update_mappings(incremental)
@@ -71,13 +124,13 @@ class RegistryOrchestrator:
 
         except Exception as e:
             logger.error(f"❌ Pipeline failed: {e}")
-            self.stats["error"] = str(e)
+            self.stats.error = str(e)
             raise
         finally:
             # Always clean up GPL-3 licensed Manager data
             self._cleanup_manager_data()
 
-    async def _update_registry_cache(self, incremental: bool):
+    async def _update_registry_cache(self, incremental: bool, session: Optional[aiohttp.ClientSession] = None):
         """Update registry cache incrementally."""
         logger.info("📦 Updating registry cache")
 
@@ -92,11 +145,12 @@ class RegistryOrchestrator:
             rate_limit_delay=self.rate_limit_delay,
             max_retries=self.max_retries,
             force_metadata_refresh=self.force_metadata_refresh,
-            nodes_per_page=200
+            nodes_per_page=200,
+            session=session
         )
 
-        cache_start = datetime.now()
-        await builder.build_cache(
+        cache_start = time.monotonic()
+        cache_stats = await builder.build_cache(
             output_file=self.cache_file,
             input_cache=input_cache,
             fetch_nodes=True,
@@ -105,41 +159,36 @@ class RegistryOrchestrator:
         )
 
         # Update stats
-        self.stats["cache_updated_at"] = datetime.now().isoformat()
-        self.stats["cache_duration_seconds"] = (datetime.now() - cache_start).total_seconds()
+        self.stats.cache_updated_at = datetime.now().isoformat()
+        self.stats.cache_duration_seconds = time.monotonic() - cache_start
 
         if self.cache_file.exists():
             cache_size_mb = self.cache_file.stat().st_size / 1024 / 1024
-            self.stats["cache_size_mb"] = round(cache_size_mb, 2)
+            self.stats.cache_size_mb = round(cache_size_mb, 2)
 
-            # Get cache stats
-            with open(self.cache_file) as f:
-                cache_data = json.load(f)
-            self.stats["total_packages"] = cache_data.get("node_count", 0)
-            self.stats["total_versions"] = cache_data.get("versions_processed", 0)
-            self.stats["total_metadata"] = cache_data.get("metadata_entries", 0)
+            # Cache stats come straight from the builder, not a re-read
+            self.stats.total_packages = cache_stats["node_count"]
+            self.stats.total_versions = cache_stats["versions_processed"]
+            self.stats.total_metadata = cache_stats["metadata_entries"]
 
-    async def _fetch_manager_data(self):
+    async def _fetch_manager_data(self, session: Optional[aiohttp.ClientSession] = None):
         """Fetch latest ComfyUI Manager extension map (GPL-3, temporary)."""
         logger.info("🔗 Fetching Manager extension data (GPL-3, temporary use only)")
 
-        fetcher = ManagerDataFetcher()
+        fetcher = ManagerDataFetcher(session=session)
+        self._temp_files.add(self.manager_file.with_suffix('.tmp'))  # Fetcher's atomic-write temp
+        self._temp_files.add(ManagerDataFetcher.validators_file(self.manager_file))
         success = await fetcher.fetch(self.manager_file, force=True)
 
         if success:
-            # Read back the data for stats
-            try:
-                with open(self.manager_file) as f:
-                    wrapped_data = json.load(f)
-                extension_count = wrapped_data.get("extension_count", 0)
-                self.stats["manager_extensions"] = extension_count
-                self.stats["manager_fetched_at"] = datetime.now().isoformat()
-                logger.info(f"✅ Fetched {extension_count} Manager extensions")
-            except Exception as e:
-                logger.warning(f"Could not read Manager data stats: {e}")
+            # Stats from the data just fetched (force=True, so never a stale skip)
+            extension_count = fetcher.data["extension_count"]
+            self.stats.manager_extensions = extension_count
+            self.stats.manager_fetched_at = fetcher.data["fetched_at"]
+            logger.info(f"✅ Fetched {extension_count} Manager extensions")
         else:
             logger.warning("❌ Failed to fetch Manager data")
-            self.stats["manager_fetch_failed"] = True
+            self.stats.manager_fetch_failed = True
 
     async def _update_mappings(self, incremental: bool):
         """Generate mappings from cache data."""
@@ -151,26 +200,32 @@ class RegistryOrchestrator:
         if not self.cache_file.exists():
             raise FileNotFoundError(f"Cache file not found: {self.cache_file}")
 
-        mappings_start = datetime.now()
+        mappings_start = time.monotonic()
 
         # Build mappings (always from scratch for now - simple approach)
         builder = GlobalMappingsBuilder()
         mappings_data = builder.build_mappings(self.cache_file)
 
         if mappings_data:
-            # Atomic write
+            # Atomic write, streamed like build_global_mappings' own output
             temp_file = self.mappings_file.with_suffix('.tmp')
-            with open(temp_file, 'w') as f:
-                json.dump(mappings_data, f, indent=2)
-            temp_file.replace(self.mappings_file)
+            self._temp_files.add(temp_file)
+            try:
+                json_utils.dump_streaming(
+                    mappings_data, temp_file, stream_keys=("mappings", "packages"), fsync=True
+                )
+                temp_file.replace(self.mappings_file)
+            except Exception:
+                temp_file.unlink(missing_ok=True)
+                raise
 
             # Update stats
-            self.stats["mappings_updated_at"] = datetime.now().isoformat()
-            self.stats["mappings_duration_seconds"] = (datetime.now() - mappings_start).total_seconds()
-            self.stats["total_signatures"] = mappings_data["stats"]["signatures"]
+            self.stats.mappings_updated_at = datetime.now().isoformat()
+            self.stats.mappings_duration_seconds = time.monotonic() - mappings_start
+            self.stats.total_signatures = mappings_data["stats"]["signatures"]
 
             mappings_size_mb = self.mappings_file.stat().st_size / 1024 / 1024
-            self.stats["mappings_size_mb"] = round(mappings_size_mb, 2)
+            self.stats.mappings_size_mb = round(mappings_size_mb, 2)
         else:
             raise RuntimeError("Failed to generate mappings")
 
@@ -186,7 +241,7 @@ class RegistryOrchestrator:
             logger.warning("Manager data not found, skipping augmentation")
             return
 
-        augment_start = datetime.now()
+        augment_start = time.monotonic()
 
         # Run augmentation
         augmenter = MappingsAugmenter(self.mappings_file, self.manager_file)
@@ -195,22 +250,23 @@ class RegistryOrchestrator:
         augmenter.save_augmented_mappings(self.mappings_file, schema_config=self.schema_config)
 
         # Update stats
-        self.stats["augmentation_completed_at"] = datetime.now().isoformat()
-        self.stats["augmentation_duration_seconds"] = (datetime.now() - augment_start).total_seconds()
-        self.stats["nodes_added_from_manager"] = augmenter.stats["nodes_added"]
-        self.stats["synthetic_packages_created"] = len(augmenter.stats["synthetic_packages_created"])
+        self.stats.augmentation_completed_at = datetime.now().isoformat()
+        self.stats.augmentation_duration_seconds = time.monotonic() - augment_start
+        self.stats.nodes_added_from_manager = augmenter.stats.nodes_added
+        self.stats.synthetic_packages_created = len(augmenter.stats.synthetic_packages_created)
 
         # Update final mappings size after augmentation
         if self.mappings_file.exists():
             mappings_size_mb = self.mappings_file.stat().st_size / 1024 / 1024
-            self.stats["final_mappings_size_mb"] = round(mappings_size_mb, 2)
+            self.stats.final_mappings_size_mb = round(mappings_size_mb, 2)
 
     def _save_state(self):
         """Save update state for tracking."""
-        self.stats["completed_at"] = datetime.now().isoformat()
+        self.stats.completed_at = datetime.now().isoformat()
+        self.stats.duration_seconds = time.monotonic() - self._start_time
 
         state_data = {
-            "last_update": self.stats,
+            "last_update": self.stats.to_dict(),
             "files": {
                 "cache": str(self.cache_file),
                 "mappings": str(self.mappings_file),
@@ -218,8 +274,7 @@ class RegistryOrchestrator:
             }
         }
 
-        with open(self.state_file, 'w') as f:
-            json.dump(state_data, f, indent=2)
+        self.state_file.write_bytes(json_utils.dumps(state_data, indent=True))
 
         logger.info(f"State saved to {self.state_file}")
 
@@ -232,10 +287,12 @@ class RegistryOrchestrator:
             except Exception as e:
                 logger.warning(f"Failed to cleanup Manager data: {e}")
 
-        # Also clean up any .tmp files
-        for tmp_file in self.data_dir.glob("*.tmp"):
+        # Also clean up temp files left by failed atomic writes and the
+        # fetcher's ETag sidecar (tracked rather than globbed, so the data
+        # directory isn't scanned)
+        for tmp_file in self._temp_files:
             try:
-                tmp_file.unlink()
+                tmp_file.unlink(missing_ok=True)
             except Exception:
                 pass
 
@@ -292,7 +349,7 @@ async def main():
         "--rate-limit-delay",
         type=float,
         default=0.1,
-        help="Delay in seconds between version requests to avoid rate limiting (default: 0.1)"
+        help="Per-worker delay in seconds between requests; caps the shared request rate at concurrency / delay (default: 0.1)"
     )
     parser.add_argument(
         "--max-retries",
@@ -332,15 +389,15 @@ async def main():
     print("\n" + "=" * 60)
     print("📊 UPDATE SUMMARY")
     print("=" * 60)
-    print(f"Duration: {(datetime.fromisoformat(stats['completed_at']) - datetime.fromisoformat(stats['started_at'])).total_seconds():.1f}s")
-    print(f"Packages: {stats.get('total_packages', 0)}")
-    print(f"Versions: {stats.get('total_versions', 0)}")
-    print(f"Signatures: {stats.get('total_signatures', 0)}")
-    print(f"Manager extensions: {stats.get('manager_extensions', 0)}")
-    print(f"Synthetic packages: {stats.get('synthetic_packages_created', 0)}")
-    print(f"Cache size: {stats.get('cache_size_mb', 0):.1f} MB")
-    print(f"Mappings size (before): {stats.get('mappings_size_mb', 0):.1f} MB")
-    print(f"Mappings size (final): {stats.get('final_mappings_size_mb', 0):.1f} MB")
+    print(f"Duration: {stats.duration_seconds:.1f}s")
+    print(f"Packages: {stats.total_packages}")
+    print(f"Versions: {stats.total_versions}")
+    print(f"Signatures: {stats.total_signatures}")
+    print(f"Manager extensions: {stats.manager_extensions}")
+    print(f"Synthetic packages: {stats.synthetic_packages_created}")
+    print(f"Cache size: {stats.cache_size_mb:.1f} MB")
+    print(f"Mappings size (before): {stats.mappings_size_mb:.1f} MB")
+    print(f"Mappings size (final): {stats.final_mappings_size_mb:.1f} MB")
     print("=" * 60)
 
 
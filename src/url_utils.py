@@ -3,11 +3,50 @@
 
 Implements the normalization strategy from node_mappings_schema_condensed.md
 to ensure consistent URL matching between Registry and Manager data sources.
+
+The public helpers are pure functions of their (hashable) string argument
+and the same repositories recur across the cache, mappings and Manager
+data, so results are memoized per process.
 """
 
+from functools import lru_cache
+from typing import Tuple
 from urllib.parse import urlparse, urlunparse
 
+# Anything that makes urlparse split off a query, fragment or params, or
+# treat the netloc specially
+_URL_SPECIAL_CHARS = frozenset('?#;[]\t\r\n')
+
+# Per-helper memo size; comfortably above the number of distinct repositories
+_CACHE_SIZE = 65536
+
+# Raw-content hosts whose /USER/REPO (or /USER/HASH) prefix maps to a
+# canonical repository URL
+_CANONICAL_HOSTS = {
+    # raw.githubusercontent.com/USER/REPO/BRANCH/... → github.com/USER/REPO
+    'raw.githubusercontent.com': 'https://github.com',
+    # gist.githubusercontent.com/USER/HASH/raw/... → gist.github.com/USER/HASH
+    'gist.githubusercontent.com': 'https://gist.github.com',
+}
+
+
+def _split_url(url: str) -> Tuple[str, str, str]:
+    """Split a URL into (scheme, netloc, path) exactly like urlparse.
+
+    Plain scheme://netloc/path URLs, which is nearly every repository URL,
+    are split with string methods; anything else falls back to urlparse.
+    """
+    scheme, sep, rest = url.partition('://')
+    if sep and scheme.isascii() and scheme.isalpha() and _URL_SPECIAL_CHARS.isdisjoint(rest):
+        netloc, slash, path = rest.partition('/')
+        if netloc:
+            return scheme.lower(), netloc, slash + path
 
+    parsed = urlparse(url)
+    return parsed.scheme, parsed.netloc, parsed.path
+
+
+@lru_cache(maxsize=_CACHE_SIZE)
 def normalize_repository_url(url: str) -> str:
     """Convert all URL variants to canonical form.
 
@@ -35,25 +74,22 @@ def normalize_repository_url(url: str) -> str:
     # Remove trailing slash
     url = url.rstrip('/')
 
-    parsed = urlparse(url)
-    path_parts = parsed.path.strip('/').split('/')
-
-    # GitHub raw file → repo
-    if parsed.netloc == 'raw.githubusercontent.com':
-        # raw.githubusercontent.com/USER/REPO/BRANCH/... → github.com/USER/REPO
-        if len(path_parts) >= 2:
-            return f'https://github.com/{path_parts[0]}/{path_parts[1]}'
+    scheme, netloc, path = _split_url(url)
 
-    # Gist raw → canonical
-    if parsed.netloc == 'gist.githubusercontent.com':
-        # gist.githubusercontent.com/USER/HASH/raw/... → gist.github.com/USER/HASH
+    # GitHub raw file → repo, gist raw → canonical
+    canonical_host = _CANONICAL_HOSTS.get(netloc)
+    if canonical_host is not None:
+        path_parts = path.strip('/').split('/', 2)
         if len(path_parts) >= 2:
-            return f'https://gist.github.com/{path_parts[0]}/{path_parts[1]}'
+            return f'{canonical_host}/{path_parts[0]}/{path_parts[1]}'
 
-    # Standard normalization
-    return urlunparse((parsed.scheme, parsed.netloc, parsed.path, '', '', ''))
+    # Standard normalization (drops any query, fragment or params)
+    if scheme and netloc:
+        return f'{scheme}://{netloc}{path}'
+    return urlunparse((scheme, netloc, path, '', '', ''))
 
 
+@lru_cache(maxsize=_CACHE_SIZE)
 def is_supported_repo_url(url: str) -> bool:
     """Check if URL is a supported repository type.
 
@@ -64,15 +100,16 @@ def is_supported_repo_url(url: str) -> bool:
         True if URL is from a supported platform
     """
     url_lower = url.lower()
-    return any([
-        'github.com' in url_lower,
-        'githubusercontent.com' in url_lower,
-        'gist.github.com' in url_lower,
-        'gitee.com' in url_lower,
-        'git.mmaker.moe' in url_lower,
-    ])
+    # Short-circuits on the first hit; gist.github.com is covered by github.com
+    return (
+        'github.com' in url_lower
+        or 'githubusercontent.com' in url_lower
+        or 'gitee.com' in url_lower
+        or 'git.mmaker.moe' in url_lower
+    )
 
 
+@lru_cache(maxsize=_CACHE_SIZE)
 def generate_manager_package_id(normalized_url: str) -> str:
     """Generate package ID for Manager-only packages.
 
@@ -82,32 +119,32 @@ def generate_manager_package_id(normalized_url: str) -> str:
     - Other: manager_domain_user_repo
 
     Args:
-        normalized_url: Already normalized repository URL
+        normalized_url: Already normalized (hence lowercase) repository URL
 
     Returns:
         Package ID with manager_ prefix
     """
-    parsed = urlparse(normalized_url)
-    path_parts = parsed.path.strip('/').split('/')
+    _, netloc, path = _split_url(normalized_url)
+    path_parts = path.strip('/').split('/', 2)
 
     # Gist: manager_gist_HASH
-    if 'gist.github.com' in parsed.netloc:
+    if 'gist.github.com' in netloc:
         if len(path_parts) >= 2:
             gist_hash = path_parts[1]
             return f"manager_gist_{gist_hash}"
 
     # GitHub: manager_USER_REPO
-    if 'github.com' in parsed.netloc:
+    if 'github.com' in netloc:
         if len(path_parts) >= 2:
-            user = path_parts[0].lower().replace('-', '_')
-            repo = path_parts[1].lower().replace('-', '_')
+            user = path_parts[0].replace('-', '_')
+            repo = path_parts[1].replace('-', '_')
             return f"manager_{user}_{repo}"
 
     # Other: manager_DOMAIN_USER_REPO
-    domain = parsed.netloc.replace('.', '_').replace('-', '_')
+    domain = netloc.replace('.', '_').replace('-', '_')
     if len(path_parts) >= 2:
-        user = path_parts[0].lower().replace('-', '_')
-        repo = path_parts[1].lower().replace('-', '_')
+        user = path_parts[0].replace('-', '_')
+        repo = path_parts[1].replace('-', '_')
         return f"manager_{domain}_{user}_{repo}"
 
     # Fallback
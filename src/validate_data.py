@@ -5,15 +5,39 @@ Ensures data integrity and consistency across files.
 """
 
 import argparse
-import json
 from datetime import datetime
+from operator import itemgetter
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Any, Dict, List, Optional, Tuple
+
+import json_utils
 
 import logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Marks a top-level field that is absent from the file
+_MISSING = object()
+
+# Required cache node fields, fetched in one C-level call on the common path
+_NODE_REQUIRED = ("id", "name")
+_node_required = itemgetter(*_NODE_REQUIRED)
+_node_id = itemgetter("id")
+
+
+def _read_trailing_fields(path: Path, header: Dict[str, Any], fields: List[str]):
+    """Add fields that follow the streamed member in the file to header.
+
+    iter_member only returns the fields that precede the streamed member, so
+    each expected field missing from the header is looked up on its own
+    (a no-op for files written in the usual header-first order).
+    """
+    for field in fields:
+        if field not in header:
+            value = json_utils.load_member(path, field, _MISSING)
+            if value is not _MISSING:
+                header[field] = value
+
 
 class DataValidator:
     """Validates registry data files for integrity and consistency."""
@@ -23,67 +47,54 @@ class DataValidator:
         self.warnings = []
 
     def validate_cache(self, cache_file: Path) -> bool:
-        """Validate registry cache file structure and content."""
+        """Validate registry cache file structure and content.
+
+        Nodes are streamed from the file and checked one at a time, so the
+        cache is never loaded into memory as a whole.
+        """
         logger.info(f"Validating cache file: {cache_file}")
 
         try:
-            with open(cache_file) as f:
-                cache = json.load(f)
+            header, nodes_kind, nodes = json_utils.iter_member(cache_file, "nodes")
+            _read_trailing_fields(cache_file, header, ["cached_at", "node_count"])
 
             # Check required top-level fields
+            present = {"nodes": nodes_kind is not None}
             required_fields = ["cached_at", "node_count", "nodes"]
             for field in required_fields:
-                if field not in cache:
+                if not present.get(field, field in header):
                     self.errors.append(f"Cache missing required field: {field}")
 
             # Validate nodes structure
-            nodes = cache.get("nodes", [])
-            if not isinstance(nodes, list):
+            if nodes_kind is not None and nodes_kind is not list:
                 self.errors.append("Cache 'nodes' field must be a list")
                 return False
 
-            # Validate node count consistency
-            declared_count = cache.get("node_count", 0)
-            actual_count = len(nodes)
-            if declared_count != actual_count:
-                self.warnings.append(f"Node count mismatch: declared {declared_count}, actual {actual_count}")
-
             # Validate individual nodes
+            actual_count = 0
             valid_nodes = 0
             nodes_with_versions = 0
             total_versions = 0
 
-            for i, node in enumerate(nodes):
-                if not isinstance(node, dict):
-                    self.errors.append(f"Node {i} is not a dict")
+            for actual_count, node in enumerate(nodes, 1):
+                version_count = self._validate_node(actual_count - 1, node)
+                if version_count is None:
                     continue
 
-                # Check required node fields
-                node_required = ["id", "name"]
-                for field in node_required:
-                    if field not in node:
-                        self.errors.append(f"Node {i} missing required field: {field}")
-
-                # Check versions
-                versions_list = node.get("versions_list", [])
-                if versions_list:
+                if version_count:
                     nodes_with_versions += 1
-                    total_versions += len(versions_list)
-
-                    # Validate version structure
-                    for j, version in enumerate(versions_list):
-                        if not isinstance(version, dict):
-                            self.errors.append(f"Node {node.get('id', i)} version {j} is not a dict")
-                            continue
-
-                        if "version" not in version:
-                            self.errors.append(f"Node {node.get('id', i)} version {j} missing 'version' field")
+                    total_versions += version_count
 
                 valid_nodes += 1
 
+            # Validate node count consistency
+            declared_count = header.get("node_count", 0)
+            if declared_count != actual_count:
+                self.warnings.append(f"Node count mismatch: declared {declared_count}, actual {actual_count}")
+
             logger.info(f"Cache validation: {valid_nodes} valid nodes, {nodes_with_versions} with versions, {total_versions} total versions")
 
-        except json.JSONDecodeError as e:
+        except json_utils.DECODE_ERRORS as e:
             self.errors.append(f"Cache file JSON decode error: {e}")
             return False
         except Exception as e:
@@ -92,69 +103,120 @@ class DataValidator:
 
         return len(self.errors) == 0
 
+    def _validate_node(self, i: int, node: Any) -> Optional[int]:
+        """Validate a single cache node and its versions.
+
+        Args:
+            i: Position of the node in the cache
+            node: Decoded node entry
+
+        Returns:
+            Number of versions the node lists, or None if it is not a dict
+        """
+        if not isinstance(node, dict):
+            self.errors.append(f"Node {i} is not a dict")
+            return None
+
+        # Check required node fields (find which ones only if a lookup fails)
+        try:
+            _node_required(node)
+        except KeyError:
+            for field in _NODE_REQUIRED:
+                if field not in node:
+                    self.errors.append(f"Node {i} missing required field: {field}")
+
+        # Check versions
+        versions_list = node.get("versions_list", [])
+        if not versions_list:
+            return 0
+
+        # Validate version structure (decoded JSON that isn't an object
+        # raises TypeError on a string subscript)
+        for j, version in enumerate(versions_list):
+            try:
+                version["version"]
+            except KeyError:
+                self.errors.append(f"Node {node.get('id', i)} version {j} missing 'version' field")
+            except TypeError:
+                self.errors.append(f"Node {node.get('id', i)} version {j} is not a dict")
+
+        return len(versions_list)
+
     def validate_mappings(self, mappings_file: Path) -> bool:
-        """Validate node mappings file structure and content."""
+        """Validate node mappings file structure and content.
+
+        The package index is decoded on its own for the orphan check, then
+        the (much larger) mappings are streamed entry by entry.
+        """
         logger.info(f"Validating mappings file: {mappings_file}")
 
         try:
-            with open(mappings_file) as f:
-                mappings = json.load(f)
+            packages_dict = json_utils.load_member(mappings_file, "packages", _MISSING)
+            header, mappings_kind, mapping_entries = json_utils.iter_member(mappings_file, "mappings")
+            _read_trailing_fields(mappings_file, header, ["version", "stats"])
 
             # Check required top-level fields
+            present = {
+                "mappings": mappings_kind is not None,
+                "packages": packages_dict is not _MISSING,
+            }
             required_fields = ["version", "stats", "mappings", "packages"]
             for field in required_fields:
-                if field not in mappings:
+                if not present.get(field, field in header):
                     self.errors.append(f"Mappings missing required field: {field}")
 
             # Validate stats
-            stats = mappings.get("stats", {})
+            stats = header.get("stats", {})
             declared_packages = stats.get("packages", 0)
             declared_signatures = stats.get("signatures", 0)
 
             # Validate mappings structure
-            mapping_dict = mappings.get("mappings", {})
-            if not isinstance(mapping_dict, dict):
+            if mappings_kind is not None and mappings_kind is not dict:
                 self.errors.append("Mappings 'mappings' field must be a dict")
                 return False
 
             # Validate packages structure
-            packages_dict = mappings.get("packages", {})
+            if packages_dict is _MISSING:
+                packages_dict = {}
             if not isinstance(packages_dict, dict):
                 self.errors.append("Mappings 'packages' field must be a dict")
                 return False
 
             # Check consistency
             actual_packages = len(packages_dict)
-            actual_signatures = len(mapping_dict)
 
             if declared_packages != actual_packages:
                 self.warnings.append(f"Package count mismatch: declared {declared_packages}, actual {actual_packages}")
 
-            if declared_signatures != actual_signatures:
-                self.warnings.append(f"Signature count mismatch: declared {declared_signatures}, actual {actual_signatures}")
-
-            # Validate mapping entries
+            # Validate mapping entries (orphan warnings follow the signature count check)
+            actual_signatures = 0
             valid_mappings = 0
             orphaned_mappings = 0
+            orphan_warnings = []
 
-            for node_key, mapping_info in mapping_dict.items():
+            for actual_signatures, (node_key, mapping_info) in enumerate(mapping_entries, 1):
                 if not isinstance(mapping_info, dict):
                     self.errors.append(f"Mapping {node_key} is not a dict")
                     continue
 
                 # Check required mapping fields
-                if "package_id" not in mapping_info:
+                try:
+                    package_id = mapping_info["package_id"]
+                except KeyError:
                     self.errors.append(f"Mapping {node_key} missing 'package_id' field")
                     continue
 
-                package_id = mapping_info["package_id"]
                 if package_id not in packages_dict:
                     orphaned_mappings += 1
                     if orphaned_mappings <= 5:  # Only show first 5
-                        self.warnings.append(f"Mapping {node_key} references missing package: {package_id}")
+                        orphan_warnings.append(f"Mapping {node_key} references missing package: {package_id}")
 
                 valid_mappings += 1
 
+            if declared_signatures != actual_signatures:
+                self.warnings.append(f"Signature count mismatch: declared {declared_signatures}, actual {actual_signatures}")
+
+            self.warnings.extend(orphan_warnings)
             if orphaned_mappings > 5:
                 self.warnings.append(f"... and {orphaned_mappings - 5} more orphaned mappings")
 
@@ -173,7 +235,7 @@ class DataValidator:
 
             logger.info(f"Mappings validation: {valid_mappings} mappings, {valid_packages} packages, {orphaned_mappings} orphaned")
 
-        except json.JSONDecodeError as e:
+        except json_utils.DECODE_ERRORS as e:
             self.errors.append(f"Mappings file JSON decode error: {e}")
             return False
         except Exception as e:
@@ -188,24 +250,24 @@ class DataValidator:
 
         try:
             # Load both files
-            with open(cache_file) as f:
-                cache = json.load(f)
-            with open(mappings_file) as f:
-                mappings = json.load(f)
+            cache = json_utils.load(cache_file)
+            mappings = json_utils.load(mappings_file)
 
-            # Get package IDs from both files
-            cache_packages = {node["id"] for node in cache.get("nodes", [])}
-            mappings_packages = set(mappings.get("packages", {}).keys())
+            # Get package IDs from both files (package keys are already unique)
+            cache_packages = set(map(_node_id, cache.get("nodes", [])))
+            mappings_packages = mappings.get("packages", {}).keys()
 
-            # Find discrepancies
-            only_in_cache = cache_packages - mappings_packages
-            only_in_mappings = mappings_packages - cache_packages
+            # Count discrepancies from the overlap; only the counts are
+            # reported, so the difference sets are never built
+            shared = len(cache_packages.intersection(mappings_packages))
+            only_in_cache = len(cache_packages) - shared
+            only_in_mappings = len(mappings_packages) - shared
 
             if only_in_cache:
-                self.warnings.append(f"{len(only_in_cache)} packages in cache but not in mappings")
+                self.warnings.append(f"{only_in_cache} packages in cache but not in mappings")
 
             if only_in_mappings:
-                self.warnings.append(f"{len(only_in_mappings)} packages in mappings but not in cache")
+                self.warnings.append(f"{only_in_mappings} packages in mappings but not in cache")
 
             # Check timestamp consistency
             cache_time = cache.get("cached_at", "")
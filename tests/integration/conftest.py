@@ -1,7 +1,6 @@
 """Pytest fixtures for integration tests."""
 
 import json
-import tempfile
 from pathlib import Path
 from typing import Dict, List
 
@@ -9,30 +8,21 @@ import pytest
 
 
 @pytest.fixture
-def temp_cache_file():
-    """Create a temporary cache file that auto-cleans."""
-    temp_file = tempfile.NamedTemporaryFile(mode='w', suffix='_cache.json', delete=False)
-    temp_file.close()
-    yield Path(temp_file.name)
-    Path(temp_file.name).unlink(missing_ok=True)
+def temp_cache_file(tmp_path):
+    """Path for a temporary cache file, removed with pytest's tmp_path."""
+    return tmp_path / "cache.json"
 
 
 @pytest.fixture
-def temp_mappings_file():
-    """Create a temporary mappings file that auto-cleans."""
-    temp_file = tempfile.NamedTemporaryFile(mode='w', suffix='_mappings.json', delete=False)
-    temp_file.close()
-    yield Path(temp_file.name)
-    Path(temp_file.name).unlink(missing_ok=True)
+def temp_mappings_file(tmp_path):
+    """Path for a temporary mappings file, removed with pytest's tmp_path."""
+    return tmp_path / "mappings.json"
 
 
 @pytest.fixture
-def temp_manager_file():
-    """Create a temporary manager data file that auto-cleans."""
-    temp_file = tempfile.NamedTemporaryFile(mode='w', suffix='_manager.json', delete=False)
-    temp_file.close()
-    yield Path(temp_file.name)
-    Path(temp_file.name).unlink(missing_ok=True)
+def temp_manager_file(tmp_path):
+    """Path for a temporary manager data file, removed with pytest's tmp_path."""
+    return tmp_path / "manager.json"
 
 
 def create_package(
@@ -496,11 +496,11 @@ class TestAugmentationEdgeCases:
         augmenter.save_augmented_mappings(temp_mappings_file)
 
         # Verify stats
-        assert augmenter.stats['nodes_added'] == 4  # Node3, Node4, Node5, Node6
-        assert augmenter.stats['nodes_skipped_exists'] == 1  # Node1
-        assert len(augmenter.stats['packages_augmented']) == 1  # pkg-a
-        assert len(augmenter.stats['synthetic_packages_created']) == 2  # synthetic-1, synthetic-2
-        assert augmenter.stats['total_manager_nodes'] == 5  # All nodes from Manager
+        assert augmenter.stats.nodes_added == 4  # Node3, Node4, Node5, Node6
+        assert augmenter.stats.nodes_skipped_exists == 1  # Node1
+        assert len(augmenter.stats.packages_augmented) == 1  # pkg-a
+        assert len(augmenter.stats.synthetic_packages_created) == 2  # synthetic-1, synthetic-2
+        assert augmenter.stats.total_manager_nodes == 5  # All nodes from Manager
 
 
 if __name__ == "__main__":
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""Tests for registry cache node-listing fetches."""
+
+import asyncio
+import json
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from build_registry_cache import RegistryCacheBuilder
+from registry_client import AsyncTokenBucket
+
+
+class FakeResponse:
+    """Minimal aiohttp response stand-in."""
+
+    def __init__(self, status, body=None, headers=None):
+        self.status = status
+        self.headers = headers or {}
+        self._body = body
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def json(self):
+        return self._body
+
+
+class FakeSession:
+    """Returns the queued responses in order, one per GET."""
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.calls = 0
+
+    async def get(self, url, params=None):
+        self.calls += 1
+        return self.responses.pop(0)
+
+
+class FakeClient:
+    def __init__(self, session, rate_limiter=None):
+        self.base_url = "https://registry.example"
+        self.session = session
+        self.rate_limiter = rate_limiter
+
+
+class TestFetchNodesPage(unittest.TestCase):
+    """Test retry handling for a single listing page."""
+
+    def fetch(self, client):
+        builder = RegistryCacheBuilder(use_metadata_store=False)
+        return asyncio.run(builder._fetch_nodes_page(client, 2, asyncio.Semaphore(1)))
+
+    def test_retries_rate_limited_page(self):
+        page = {"nodes": [{"id": "a"}], "totalPages": 2}
+        session = FakeSession([
+            FakeResponse(429, headers={"Retry-After": "0"}),
+            FakeResponse(503),
+            FakeResponse(200, page),
+        ])
+
+        with mock.patch("build_registry_cache.full_jitter_backoff", return_value=0):
+            self.assertEqual(self.fetch(FakeClient(session)), page)
+        self.assertEqual(session.calls, 3)
+
+    def test_rate_limit_backs_off_bucket(self):
+        bucket = AsyncTokenBucket(rate=8.0, burst=5)
+        session = FakeSession([
+            FakeResponse(429, headers={"Retry-After": "0"}),
+            FakeResponse(200, {"nodes": []}),
+        ])
+
+        self.assertEqual(self.fetch(FakeClient(session, bucket)), {"nodes": []})
+        self.assertLess(bucket.rate, 8.0)
+
+    def test_other_client_errors_give_up(self):
+        session = FakeSession([FakeResponse(404)])
+
+        self.assertIsNone(self.fetch(FakeClient(session)))
+        self.assertEqual(session.calls, 1)
+
+
+class MetadataClient:
+    """Serves comfy-nodes per version; an exception value is raised instead."""
+
+    def __init__(self, results):
+        self.results = results
+
+    async def get_comfy_nodes(self, node_id, version):
+        result = self.results[version]
+        if isinstance(result, BaseException):
+            raise result
+        return result
+
+
+class TestFetchNodeMetadata(unittest.TestCase):
+    """A partially completed metadata fetch must still reach the next save."""
+
+    def setUp(self):
+        self.builder = RegistryCacheBuilder(max_versions=2, use_metadata_store=False)
+        self.builder.nodes_data["n"] = {
+            "id": "n",
+            "versions_list": [
+                {"version": "2.0", "comfy_nodes": [], "metadata_cached": False},
+                {"version": "1.0", "comfy_nodes": [], "metadata_cached": False},
+            ],
+        }
+        self.builder._missing_metadata["n"] = 2
+        # As after a Phase 2 checkpoint: cached bytes, nothing dirty
+        self.builder._node_serialized["n"] = self.builder._serialize_node("n")
+
+    def fetch(self, client):
+        asyncio.run(self.builder._fetch_node_metadata(client, "n"))
+
+    def serialized_versions(self):
+        return json.loads(self.builder._serialize_node("n"))["versions_list"]
+
+    def test_later_version_failure_keeps_earlier_metadata(self):
+        self.fetch(MetadataClient({"2.0": [{"name": "X"}], "1.0": RuntimeError("boom")}))
+
+        self.assertIn("n", self.builder.failed_nodes)
+        self.assertIn("n", self.builder._dirty_node_ids)
+        self.assertEqual(self.serialized_versions()[0]["comfy_nodes"], [{"name": "X"}])
+        self.assertEqual(self.builder._total_metadata, 1)
+        self.assertEqual(self.builder._missing_metadata["n"], 1)
+        self.assertEqual(self.builder.nodes_data["n"]["metadata_count"], 1)
+
+    def test_cancelled_fetch_keeps_earlier_metadata(self):
+        with self.assertRaises(asyncio.CancelledError):
+            self.fetch(MetadataClient({"2.0": [{"name": "X"}], "1.0": asyncio.CancelledError()}))
+
+        self.assertIn("n", self.builder._dirty_node_ids)
+        self.assertEqual(self.serialized_versions()[0]["comfy_nodes"], [{"name": "X"}])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""Tests for registry client rate limiting helpers."""
+
+import asyncio
+import time
+import unittest
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from pathlib import Path
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from registry_client import MAX_RETRY_AFTER, AsyncTokenBucket, RegistryClient, parse_retry_after
+
+
+class TestParseRetryAfter(unittest.TestCase):
+    """Test Retry-After header parsing."""
+
+    def test_seconds(self):
+        self.assertEqual(parse_retry_after("3"), 3.0)
+
+    def test_http_date(self):
+        retry_at = datetime.now(timezone.utc) + timedelta(seconds=30)
+        delay = parse_retry_after(format_datetime(retry_at, usegmt=True))
+        self.assertGreater(delay, 25)
+        self.assertLessEqual(delay, 30)
+
+    def test_missing_or_invalid(self):
+        self.assertIsNone(parse_retry_after(None))
+        self.assertIsNone(parse_retry_after("soon"))
+
+    def test_non_finite_rejected(self):
+        for value in ("inf", "-inf", "nan", "Infinity"):
+            self.assertIsNone(parse_retry_after(value), value)
+
+    def test_clamped(self):
+        self.assertEqual(parse_retry_after("-5"), 0.0)
+        self.assertEqual(parse_retry_after("1e9"), MAX_RETRY_AFTER)
+        far = datetime.now(timezone.utc) + timedelta(days=1)
+        self.assertEqual(parse_retry_after(format_datetime(far, usegmt=True)), MAX_RETRY_AFTER)
+
+
+class TestAsyncTokenBucket(unittest.TestCase):
+    """Test adaptive token bucket behavior."""
+
+    def test_burst_then_paced(self):
+        """Burst tokens are immediate, further requests wait for refill."""
+        async def run():
+            bucket = AsyncTokenBucket(rate=20.0, burst=2, max_rate=20.0)
+            start = time.monotonic()
+            for _ in range(4):
+                await bucket.acquire()
+            return time.monotonic() - start
+
+        elapsed = asyncio.run(run())
+        self.assertGreaterEqual(elapsed, 0.09)
+
+    def test_backoff_halves_rate_and_blocks(self):
+        async def run():
+            bucket = AsyncTokenBucket(rate=8.0, burst=5)
+            bucket.backoff(0.1)
+            start = time.monotonic()
+            await bucket.acquire()
+            return bucket, time.monotonic() - start
+
+        bucket, elapsed = asyncio.run(run())
+        self.assertEqual(bucket.rate, 4.0)
+        self.assertGreaterEqual(elapsed, 0.09)
+
+    def test_recover_is_capped(self):
+        bucket = AsyncTokenBucket(rate=10.0, max_rate=10.0)
+        bucket.recover()
+        self.assertEqual(bucket.rate, 10.0)
+
+        bucket = AsyncTokenBucket(rate=0.01, min_rate=0.5)
+        self.assertEqual(bucket.rate, 0.5)
+
+
+class FakeResponse:
+    """Minimal aiohttp response stand-in."""
+
+    def __init__(self, status, body=None):
+        self.status = status
+        self.headers = {}
+        self._body = body
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def json(self):
+        return self._body
+
+
+class FakeSession:
+    """Answers every GET with the same response."""
+
+    def __init__(self, response):
+        self.response = response
+
+    def get(self, url, params=None):
+        return self.response
+
+
+class TestRecoverOnSuccess(unittest.TestCase):
+    """Only successful responses raise the bucket's rate."""
+
+    def client(self, response):
+        bucket = AsyncTokenBucket(rate=4.0, burst=5)
+        return RegistryClient(rate_limiter=bucket, session=FakeSession(response)), bucket
+
+    def test_versions_error_does_not_recover(self):
+        client, bucket = self.client(FakeResponse(500))
+        self.assertEqual(asyncio.run(client.get_node_versions("n")), [])
+        self.assertEqual(bucket.rate, 4.0)
+
+    def test_versions_success_recovers(self):
+        client, bucket = self.client(FakeResponse(200, []))
+        asyncio.run(client.get_node_versions("n"))
+        self.assertGreater(bucket.rate, 4.0)
+
+    def test_comfy_nodes_errors_do_not_recover(self):
+        for status in (404, 503):
+            client, bucket = self.client(FakeResponse(status))
+            asyncio.run(client.get_comfy_nodes("n", "1.0"))
+            self.assertEqual(bucket.rate, 4.0, status)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 """Tests for schema filter functionality."""
 
+import copy
 import json
 import tempfile
 import unittest
@@ -9,6 +10,7 @@ from pathlib import Path
 import sys
 sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
 
+import json_utils
 from schema_filter import SchemaFilter
 
 
@@ -211,6 +213,34 @@ source = true
         self.assertIn("version", version)
         self.assertNotIn("changelog", version)
 
+    def test_dump_filtered_matches_filter_then_dump(self):
+        """Test single-pass filtered dump writes the same bytes as filter + dump."""
+        full_output = {
+            "version": "2025.01.01",
+            "generated_at": "2025-01-01T00:00:00",
+            "stats": {"packages": 1, "signatures": 1},
+            "mappings": {"TestNode::_": [self.full_mapping]},
+            "packages": {"test-package": self.full_package}
+        }
+
+        drop_config = tempfile.NamedTemporaryFile(mode='w', suffix='.toml', delete=False)
+        drop_config.write(self.minimal_config.replace("rank = true", "rank = false"))
+        drop_config.close()
+        self.addCleanup(Path(drop_config.name).unlink, missing_ok=True)
+
+        for config in (self.config_file.name, drop_config.name, "/nonexistent/config.toml"):
+            filter = SchemaFilter(Path(config))
+            if config == drop_config.name:
+                self.assertEqual(filter._mapping_drop, {"rank"})
+            with tempfile.TemporaryDirectory() as tmp:
+                output_file = Path(tmp) / "mappings.json"
+                # Filtering is in place, so each side gets its own copy
+                filter.dump_filtered(copy.deepcopy(full_output), output_file)
+                expected = json_utils.dumps(
+                    filter.filter_mappings_output(copy.deepcopy(full_output)), indent=True
+                )
+                self.assertEqual(output_file.read_bytes(), expected)
+
     def test_filter_empty_versions_dict(self):
         """Test filtering package with empty versions (synthetic packages)."""
         filter = SchemaFilter(Path(self.config_file.name))
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""Tests for data file validation."""
+
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from validate_data import DataValidator
+
+
+class TestFieldOrder(unittest.TestCase):
+    """Top-level fields are valid in any order, including after the streamed member."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+
+    def write(self, name, raw):
+        path = Path(self.temp_dir.name) / name
+        path.write_text(raw)
+        return path
+
+    def validate_cache(self, raw):
+        validator = DataValidator()
+        ok = validator.validate_cache(self.write("cache.json", raw))
+        return ok, validator
+
+    def validate_mappings(self, raw):
+        validator = DataValidator()
+        ok = validator.validate_mappings(self.write("mappings.json", raw))
+        return ok, validator
+
+    def test_cache_header_first(self):
+        ok, validator = self.validate_cache(
+            '{"cached_at": "2025-01-01T00:00:00", "node_count": 1, "nodes": [{"id": "a", "name": "A"}]}'
+        )
+        self.assertTrue(ok)
+        self.assertEqual(validator.warnings, [])
+
+    def test_cache_fields_after_nodes(self):
+        ok, validator = self.validate_cache(
+            '{"nodes": [{"id": "a", "name": "A"}], "node_count": 1, "cached_at": "2025-01-01T00:00:00"}'
+        )
+        self.assertTrue(ok, validator.errors)
+        self.assertEqual(validator.warnings, [])
+
+    def test_cache_missing_field_still_reported(self):
+        ok, validator = self.validate_cache('{"nodes": [], "node_count": 0}')
+        self.assertFalse(ok)
+        self.assertEqual(validator.errors, ["Cache missing required field: cached_at"])
+
+    def test_mappings_fields_after_mappings(self):
+        data = {
+            "mappings": {"Node::_": {"package_id": "a"}},
+            "packages": {"a": {"display_name": "A"}},
+            "stats": {"packages": 1, "signatures": 1},
+            "version": "2025.01.01",
+        }
+        ok, validator = self.validate_mappings(json.dumps(data))
+        self.assertTrue(ok, validator.errors)
+        self.assertEqual(validator.warnings, [])
+
+
+if __name__ == '__main__':
+    unittest.main()